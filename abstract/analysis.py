@@ -1,6 +1,75 @@
 from abc import ABC, abstractmethod
+from contextlib import nullcontext
+import pandas as pd
+from abstract.arquivos import escrita_atomica
 
 class Analysis(ABC):
 
+    # Destino opcional dos resultados (ex: ResultadosSQLite) e identificação da execução.
+    # Definidos pelo Controller; por padrão os resultados são apenas exportados em arquivos.
+    sink = None
+    exportar_arquivos = True
+    run_id = None
+    series_id = None
+    # Quando False, as análises não renderizam figuras (execuções sem gráficos)
+    gerar_graficos = True
+    # Etapa de gráficos (model.graficos.Graficos) que recebe as figuras agendadas.
+    # Sem ela, cada figura é renderizada ao ser agendada.
+    graficos = None
+    # Instrumentação opcional (abstract.instrumentacao.Instrumentacao), definida pelo Controller
+    instrumentacao = None
+
+    def _etapa(self, nome: str):
+        """
+        Contexto que mede uma sub-etapa (ex: "fit", "plot", "persist") quando instrumentado.
+        """
+        if self.instrumentacao is None:
+            return nullcontext()
+        return self.instrumentacao.etapa(nome)
+
+    def _registrar_arquivo(self, path: str):
+        if self.instrumentacao is not None:
+            self.instrumentacao.registrar_arquivo(path)
+
+    def _agendar_grafico(self, tipo: str, dados: dict, path: str):
+        """
+        Agenda uma figura a partir de dados pré-calculados (ver model.graficos.RENDERIZADORES).
+        """
+        if not self.gerar_graficos:
+            return
+        if self.graficos is not None:
+            self.graficos.agendar(tipo, dados, path)
+            return
+        from model.graficos import renderizar
+
+        with self._etapa("plot"):
+            renderizar((tipo, dados, path))
+            self._registrar_arquivo(path)
+        print(f"Gráfico salvo em: {path}")
+
+    def _save_frame(self, df: pd.DataFrame, path: str, tabela: str, index: bool = False):
+        """
+        Persiste uma tabela de resultados: exporta o CSV e/ou grava no sink.
+        """
+        with self._etapa("persist"):
+            if self.exportar_arquivos:
+                with escrita_atomica(path, newline='') as f:
+                    df.to_csv(f, index=index)
+                self._registrar_arquivo(path)
+            if self.sink is not None:
+                self.sink.inserir(tabela, self.run_id, self.series_id, df.reset_index() if index else df)
+
+    def _save_text(self, text: str, path: str, questao: str):
+        """
+        Persiste um texto de interpretação: exporta o TXT e/ou grava no sink.
+        """
+        with self._etapa("persist"):
+            if self.exportar_arquivos:
+                with escrita_atomica(path) as f:
+                    f.write(text)
+                self._registrar_arquivo(path)
+            if self.sink is not None:
+                self.sink.inserir_texto(questao, self.run_id, self.series_id, text)
+
     def run(self):
-        pass
\ No newline at end of file
+        pass
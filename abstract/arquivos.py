@@ -0,0 +1,39 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+"""
+Escrita atômica de artefatos: o conteúdo é gravado em um arquivo temporário no mesmo
+diretório e publicado com os.replace, de modo que leitores (ou execuções concorrentes)
+nunca veem um arquivo parcialmente escrito.
+"""
+
+# mkstemp/mkdtemp criam com permissão 0600/0700; os artefatos publicados seguem a umask do processo
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def aplicar_umask(path: str):
+    """
+    Aplica a path a permissão padrão do processo (mkstemp/mkdtemp criam com 0600/0700).
+    """
+    os.chmod(path, (0o777 if os.path.isdir(path) else 0o666) & ~_UMASK)
+
+
+@contextmanager
+def escrita_atomica(path: str, modo: str = 'w', **kwargs):
+    """
+    Abre um arquivo temporário para escrita e o renomeia para `path` ao final.
+    Em caso de erro o temporário é removido e o arquivo anterior (se houver) é preservado.
+    """
+    diretorio = os.path.dirname(os.path.abspath(path))
+    fd, temporario = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=diretorio)
+    try:
+        with os.fdopen(fd, modo, **kwargs) as f:
+            yield f
+        aplicar_umask(temporario)
+        os.replace(temporario, path)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
@@ -0,0 +1,144 @@
+import cProfile
+import json
+import marshal
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+
+from abstract.arquivos import escrita_atomica
+
+"""
+Instrumentação das etapas do pipeline.
+Registra, para cada etapa e sub-etapa (ex: "questao3", "questao3/fit", "questao3/plot"),
+o tempo de parede, o tempo de CPU, o pico de memória (tracemalloc) e os bytes gravados,
+opcionalmente perfilando a etapa com cProfile, e produz um trace JSON da execução.
+"""
+
+class Instrumentacao:
+
+    def __init__(self, medir_memoria: bool = True, perfilar: list = None, diretorio_perfis: str = None):
+        self.medir_memoria = medir_memoria
+        self.perfilar = set(perfilar or [])
+        self.diretorio_perfis = diretorio_perfis
+        self.spans = []
+        self._pilha = []
+        self._iniciou_tracemalloc = False
+
+    def _pico_atual(self) -> int:
+        return tracemalloc.get_traced_memory()[1] if self.medir_memoria else 0
+
+    @contextmanager
+    def etapa(self, nome: str, prefixar: bool = True):
+        """
+        Mede um bloco de código. Etapas aninhadas recebem o nome "pai/filho";
+        com prefixar=False a etapa não prefixa o nome das filhas (ex: o total da execução).
+        """
+        if self.medir_memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._iniciou_tracemalloc = True
+
+        pai = self._pilha[-1] if self._pilha else None
+        if pai is not None and self.medir_memoria:
+            # Preserva o pico já atingido pelo pai antes de zerar para o filho
+            pai["_pico"] = max(pai["_pico"], self._pico_atual())
+        if self.medir_memoria:
+            tracemalloc.reset_peak()
+
+        span = {
+            "nome": f"{pai['_prefixo']}{nome}" if pai else nome,
+            "_prefixo": "",
+            "bytes_gravados": 0,
+            "_memoria_inicial": tracemalloc.get_traced_memory()[0] if self.medir_memoria else 0,
+            "_pico": 0
+        }
+        if prefixar:
+            span["_prefixo"] = span["nome"] + "/"
+        elif pai is not None:
+            span["_prefixo"] = pai["_prefixo"]
+        self._pilha.append(span)
+
+        perfil = cProfile.Profile() if span["nome"] in self.perfilar else None
+        parede, cpu = time.perf_counter(), time.process_time()
+        if perfil is not None:
+            perfil.enable()
+        try:
+            yield span
+        finally:
+            if perfil is not None:
+                perfil.disable()
+            span["parede_s"] = time.perf_counter() - parede
+            span["cpu_s"] = time.process_time() - cpu
+            self._pilha.pop()
+            span.pop("_prefixo")
+
+            pico = max(span.pop("_pico"), self._pico_atual())
+            span["pico_memoria_mb"] = (pico - span.pop("_memoria_inicial")) / (1024 * 1024) if self.medir_memoria else None
+            if pai is not None:
+                pai["_pico"] = max(pai["_pico"], pico)
+            if perfil is not None:
+                span["perfil"] = self._salvar_perfil(perfil, span["nome"])
+            self.spans.append(span)
+
+            if self._iniciou_tracemalloc and not self._pilha:
+                tracemalloc.stop()
+                self._iniciou_tracemalloc = False
+
+    def _salvar_perfil(self, perfil: cProfile.Profile, nome: str) -> str:
+        diretorio = self.diretorio_perfis or "."
+        if not os.path.exists(diretorio):
+            os.makedirs(diretorio)
+        path = os.path.join(diretorio, f"perfil_{nome.replace('/', '_')}.prof")
+        # Mesmo formato de Profile.dump_stats (lido por pstats), publicado atomicamente
+        perfil.create_stats()
+        with escrita_atomica(path, 'wb') as f:
+            marshal.dump(perfil.stats, f)
+        print(f"Perfil cProfile salvo em: {path}")
+        return path
+
+    def registrar_bytes(self, n: int):
+        """
+        Contabiliza bytes gravados em todas as etapas abertas.
+        """
+        for span in self._pilha:
+            span["bytes_gravados"] += n
+
+    def registrar_arquivo(self, path: str):
+        if os.path.exists(path):
+            self.registrar_bytes(os.path.getsize(path))
+
+    def trace(self, **meta) -> dict:
+        return {**meta, "spans": list(self.spans)}
+
+    def salvar(self, path: str, **meta):
+        with escrita_atomica(path) as f:
+            json.dump(self.trace(**meta), f, indent=2)
+        print(f"Trace da execução salvo em: {path}")
+
+
+def agregar_traces(traces: list, percentis: tuple = (50, 90, 99)) -> dict:
+    """
+    Agrega os traces de várias execuções (modo frota) em percentis por etapa
+    e aponta a etapa de primeiro nível com maior latência de cauda.
+    """
+    por_etapa = {}
+    for trace in traces:
+        for span in trace["spans"]:
+            por_etapa.setdefault(span["nome"], []).append(span)
+
+    resumo = {}
+    for nome, spans in por_etapa.items():
+        resumo[nome] = {"n": len(spans)}
+        for medida in ("parede_s", "cpu_s", "pico_memoria_mb", "bytes_gravados"):
+            valores = np.array([s[medida] for s in spans if s.get(medida) is not None], dtype=float)
+            if len(valores) == 0:
+                continue
+            resumo[nome][medida] = {f"p{p}": float(np.percentile(valores, p)) for p in percentis}
+            resumo[nome][medida]["max"] = float(valores.max())
+
+    maior = f"p{max(percentis)}"
+    principais = {n: r for n, r in resumo.items() if "/" not in n and n != "total" and "parede_s" in r}
+    cauda = max(principais, key=lambda n: principais[n]["parede_s"][maior]) if principais else None
+    return {"n_execucoes": len(traces), "etapas": resumo, "etapa_cauda": cauda}
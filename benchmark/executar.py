@@ -0,0 +1,247 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+
+from benchmark.sinteticos import gerar_frota
+from controller.controller import Controller
+from model import kernels
+from model.painel_compacto import PainelCompacto
+
+"""
+Benchmark do pipeline: gera séries sintéticas com comprimentos e quantidades configuráveis,
+mede cada etapa (Questões 1-5, hierarquia, gráficos e Relatório) e o Controller completo, registra o
+pico de memória e grava os resultados em JSON Lines para comparação entre execuções.
+Também compara a memória da frota como pd.Series com a do PainelCompacto (float64/float32) e
+mede os kernels vetorizados (SES, ACF, outliers, diagnóstico dos resíduos) aplicados ao painel inteiro.
+
+Uso:
+    python -m benchmark.executar --comprimentos 1000 10000 --quantidades 1 10
+    python -m benchmark.executar --comparar benchmark/resultados/base.jsonl
+"""
+
+ETAPAS = ["questao1", "questao2", "questao3", "hierarquia", "questao4", "questao5", "graficos", "relatorio"]
+
+
+def _commit_atual() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _pico_rss_mb() -> float:
+    # ru_maxrss é dado em KB no Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if platform.system() == "Darwin" else pico / 1024
+
+
+class Cronometro:
+
+    def __init__(self, medir_memoria: bool):
+        self.medir_memoria = medir_memoria
+        self.tempos = {}
+        self.memoria = {}
+
+    def envolver(self, nome: str, funcao):
+        """
+        Retorna a função instrumentada: acumula tempo (e pico de memória via tracemalloc).
+        """
+        def _cronometrada(*args, **kwargs):
+            if self.medir_memoria:
+                tracemalloc.reset_peak()
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                self.tempos.setdefault(nome, []).append(time.perf_counter() - inicio)
+                if self.medir_memoria:
+                    pico = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+                    self.memoria[nome] = max(self.memoria.get(nome, 0.0), pico)
+        return _cronometrada
+
+
+def _resumo(valores: list) -> dict:
+    arr = np.asarray(valores)
+    return {
+        "total_s": float(arr.sum()),
+        "media_s": float(arr.mean()),
+        "min_s": float(arr.min()),
+        "max_s": float(arr.max()),
+        "p50_s": float(np.percentile(arr, 50)),
+        "p95_s": float(np.percentile(arr, 95))
+    }
+
+
+def comparar_representacoes(series: dict) -> dict:
+    """
+    Memória da frota como pd.Series (valores + DatetimeIndex por série) e como PainelCompacto.
+    """
+    pandas_mb = sum(int(s.memory_usage(index=True, deep=True)) for s in series.values()) / (1024 * 1024)
+    resultado = {"pandas_mb": pandas_mb}
+    for dtype in (np.float64, np.float32):
+        painel = PainelCompacto.from_series(series, dtype=dtype)
+        nome = np.dtype(dtype).name
+        resultado[f"compacto_{nome}_mb"] = painel.nbytes / (1024 * 1024)
+        resultado[f"economia_{nome}"] = pandas_mb / max(resultado[f"compacto_{nome}_mb"], 1e-12)
+    return resultado
+
+
+def executar_kernels(series: dict, freq: int, cronometro: "Cronometro", dtype=np.float32):
+    """
+    Executa os kernels vetorizados (caminho compacto) sobre a frota inteira de uma vez.
+    """
+    painel = cronometro.envolver("compacto_montagem", PainelCompacto.from_series)(series, dtype=dtype)
+    nlags = ((40 + freq - 1) // freq) * freq
+
+    def _executar():
+        ajuste = kernels.ses_ajustar(painel.valores)
+        previsoes, _ = kernels.ses_filtrar(painel.valores, ajuste["alpha"], ajuste["nivel_inicial"])
+        kernels.acf(painel.valores, nlags, qstat=True)
+        residuos = painel.valores - previsoes
+        kernels.outliers_3sigma(residuos)
+        kernels.diagnostico_residuos(residuos, max(2, min(10, painel.comprimento // 5)), graus_modelo=1)
+
+    cronometro.envolver("compacto_kernels", _executar)()
+
+
+def executar_cenario(comprimento: int, n_series: int, freq: int, h: int, sem_pdf: bool,
+                     medir_memoria: bool, seed: int) -> dict:
+    """
+    Executa o pipeline completo para uma frota sintética e devolve as medições.
+    """
+    inicio_geracao = time.perf_counter()
+    series = gerar_frota(n_series, comprimento, seed=seed)
+    tempo_geracao = time.perf_counter() - inicio_geracao
+    representacoes = comparar_representacoes(series)
+
+    cronometro = Cronometro(medir_memoria)
+    diretorio = tempfile.mkdtemp(prefix="bench_")
+    if medir_memoria:
+        tracemalloc.start()
+    try:
+        with warnings.catch_warnings(), contextlib.redirect_stdout(io.StringIO()):
+            warnings.simplefilter("ignore")
+            for serie_id, serie in series.items():
+                construir = cronometro.envolver("controller_init", Controller)
+                controller = construir(serie, freq, h, os.path.join(diretorio, serie_id))
+                if sem_pdf:
+                    controller.relatorio.run = controller.relatorio.persist_results
+                for etapa in ETAPAS:
+                    nome = f"_run_{etapa}"
+                    setattr(controller, nome, cronometro.envolver(etapa, getattr(controller, nome)))
+                cronometro.envolver("controller", controller.run)()
+            executar_kernels(series, freq, cronometro)
+    finally:
+        if medir_memoria:
+            tracemalloc.stop()
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+    return {
+        "comprimento": comprimento,
+        "n_series": n_series,
+        "freq": freq,
+        "h": h,
+        "sem_pdf": sem_pdf,
+        "memoria": medir_memoria,
+        "geracao_s": tempo_geracao,
+        "etapas": {nome: _resumo(v) for nome, v in cronometro.tempos.items()},
+        "pico_memoria_mb": cronometro.memoria if medir_memoria else None,
+        "representacao_mb": representacoes,
+        "pico_rss_mb": _pico_rss_mb()
+    }
+
+
+def comparar(atual: list, base_path: str, limiar: float):
+    """
+    Compara os tempos médios por etapa com um arquivo de resultados anterior.
+    """
+    with open(base_path, 'r') as f:
+        base = [json.loads(linha) for linha in f if linha.strip()]
+    # tracemalloc altera os tempos: só compara cenários medidos da mesma forma
+    chave = lambda r: (r["comprimento"], r["n_series"], r["freq"], r["h"], r["sem_pdf"], r.get("memoria", False))
+    base_por_chave = {chave(r): r for r in base}
+
+    regressoes = 0
+    for r in atual:
+        anterior = base_por_chave.get(chave(r))
+        if anterior is None:
+            continue
+        print(f"Cenário comprimento={r['comprimento']} n_series={r['n_series']}:")
+        for etapa, stats in r["etapas"].items():
+            if etapa not in anterior["etapas"]:
+                continue
+            razao = stats["media_s"] / max(anterior["etapas"][etapa]["media_s"], 1e-12)
+            marca = "  <-- REGRESSÃO" if razao > 1 + limiar else ""
+            regressoes += bool(marca)
+            print(f"  {etapa:16s} {anterior['etapas'][etapa]['media_s']:10.4f}s -> {stats['media_s']:10.4f}s "
+                  f"({razao:5.2f}x){marca}")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline de séries temporais.")
+    parser.add_argument("--comprimentos", type=int, nargs="+", default=[1000],
+                        help="Comprimentos das séries sintéticas (ex: 1000 100000 10000000)")
+    parser.add_argument("--quantidades", type=int, nargs="+", default=[1],
+                        help="Quantidades de séries por cenário (ex: 1 100 100000)")
+    parser.add_argument("--freq", type=int, default=7)
+    parser.add_argument("--h", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sem-pdf", action="store_true", help="Gera o .tex sem compilar o PDF")
+    parser.add_argument("--memoria", action="store_true",
+                        help="Mede o pico de memória por etapa com tracemalloc (mais lento)")
+    parser.add_argument("--saida", default=os.path.join("benchmark", "resultados", "resultados.jsonl"))
+    parser.add_argument("--comparar", help="Arquivo JSON Lines de uma execução anterior")
+    parser.add_argument("--limiar", type=float, default=0.10, help="Aumento relativo considerado regressão")
+    args = parser.parse_args()
+
+    meta = {
+        "executado_em": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _commit_atual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform()
+    }
+
+    resultados = []
+    for comprimento in args.comprimentos:
+        for n_series in args.quantidades:
+            print(f"Executando cenário: comprimento={comprimento}, n_series={n_series}...")
+            resultado = executar_cenario(comprimento, n_series, args.freq, args.h, args.sem_pdf,
+                                         args.memoria, args.seed)
+            resultado.update(meta)
+            resultados.append(resultado)
+            controller = resultado["etapas"]["controller"]
+            print(f"  Controller: média {controller['media_s']:.4f}s, total {controller['total_s']:.4f}s, "
+                  f"pico RSS {resultado['pico_rss_mb']:.1f} MB")
+            rep = resultado["representacao_mb"]
+            print(f"  Memória das séries: pandas {rep['pandas_mb']:.2f} MB, compacto float64 "
+                  f"{rep['compacto_float64_mb']:.2f} MB ({rep['economia_float64']:.1f}x), float32 "
+                  f"{rep['compacto_float32_mb']:.2f} MB ({rep['economia_float32']:.1f}x); kernels compactos "
+                  f"{resultado['etapas']['compacto_kernels']['total_s']:.4f}s")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.saida)), exist_ok=True)
+    with open(args.saida, 'a') as f:
+        for resultado in resultados:
+            f.write(json.dumps(resultado) + "\n")
+    print(f"Resultados do benchmark salvos em: {args.saida}")
+
+    if args.comparar:
+        regressoes = comparar(resultados, args.comparar, args.limiar)
+        print(f"{regressoes} regressões acima de {args.limiar:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
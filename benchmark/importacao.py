@@ -0,0 +1,75 @@
+import argparse
+import statistics
+import subprocess
+import sys
+
+"""
+Mede o tempo de importação dos módulos do projeto em processos novos (importação a frio).
+Com --limite, encerra com código de erro se o tempo mediano de algum módulo exceder o
+limite, servindo como verificação de regressão do tempo de inicialização.
+
+Uso:
+    python -m benchmark.importacao
+    python -m benchmark.importacao --modulos controller.controller --limite 1.0
+"""
+
+MODULOS = [
+    "controller.controller",
+    "model.questao1",
+    "model.questao2",
+    "model.questao3",
+    "model.questao4",
+    "model.questao5",
+    "model.relatorio",
+]
+
+# Dependências que não devem ser carregadas apenas por importar o Controller
+PESADAS = ["statsmodels", "matplotlib", "sklearn", "jinja2", "scipy"]
+
+
+def medir_importacao(modulo: str, repeticoes: int = 5) -> float:
+    """
+    Tempo mediano (s) de "import <modulo>" em um interpretador novo.
+    """
+    codigo = (
+        "import time; t = time.perf_counter(); "
+        f"import {modulo}; "
+        "print(time.perf_counter() - t)"
+    )
+    tempos = []
+    for _ in range(repeticoes):
+        saida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True)
+        tempos.append(float(saida.stdout.strip().splitlines()[-1]))
+    return statistics.median(tempos)
+
+
+def dependencias_carregadas(modulo: str) -> list:
+    """
+    Lista as dependências pesadas carregadas como efeito da importação do módulo.
+    """
+    codigo = f"import sys, {modulo}; print(' '.join(sorted(sys.modules)))"
+    saida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True)
+    carregados = set(saida.stdout.split())
+    return [p for p in PESADAS if p in carregados]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de importação a frio dos módulos do projeto.")
+    parser.add_argument("--modulos", nargs="+", default=MODULOS)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--limite", type=float, help="Tempo máximo (s) aceito por módulo")
+    args = parser.parse_args()
+
+    falhas = 0
+    for modulo in args.modulos:
+        tempo = medir_importacao(modulo, args.repeticoes)
+        pesadas = dependencias_carregadas(modulo)
+        excedeu = args.limite is not None and tempo > args.limite
+        falhas += excedeu
+        print(f"{modulo:28s} {tempo * 1000:8.1f} ms  dependências pesadas: {', '.join(pesadas) or '-'}"
+              f"{'  <-- ACIMA DO LIMITE' if excedeu else ''}")
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
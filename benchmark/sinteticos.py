@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+"""
+Geradores de séries sintéticas para o benchmark do pipeline.
+Cada série combina nível, tendência, sazonalidade semanal, mudanças de nível e outliers
+injetados, com frequência diária (como a série de nascimentos).
+"""
+
+def gerar_serie(comprimento: int, nivel: float = 40.0, tendencia: float = 0.0, amplitude_semanal: float = 3.0,
+                n_mudancas_nivel: int = 2, tamanho_mudanca: float = 5.0, frac_outliers: float = 0.01,
+                tamanho_outlier: float = 6.0, ruido: float = 2.0, inicio: str = "2000-01-01",
+                seed: int = None, nome: str = None) -> pd.Series:
+    """
+    Gera uma série diária sintética.
+    - tendencia: incremento por passo;
+    - amplitude_semanal: amplitude do ciclo de período 7;
+    - n_mudancas_nivel: quantidade de degraus de nível em posições aleatórias;
+    - frac_outliers: fração de pontos com choques de tamanho_outlier * ruido.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(comprimento, dtype=float)
+
+    valores = nivel + tendencia * t + amplitude_semanal * np.sin(2 * np.pi * t / 7)
+    valores += rng.normal(0.0, ruido, comprimento)
+
+    # Mudanças de nível (degraus) em posições aleatórias
+    if n_mudancas_nivel > 0 and comprimento > 1:
+        posicoes = rng.integers(1, comprimento, n_mudancas_nivel)
+        degraus = np.zeros(comprimento)
+        np.add.at(degraus, posicoes, rng.choice([-1.0, 1.0], n_mudancas_nivel) * tamanho_mudanca)
+        valores += np.cumsum(degraus)
+
+    # Outliers injetados
+    n_outliers = int(round(frac_outliers * comprimento))
+    if n_outliers > 0:
+        posicoes = rng.choice(comprimento, n_outliers, replace=False)
+        valores[posicoes] += rng.choice([-1.0, 1.0], n_outliers) * tamanho_outlier * ruido
+
+    index = pd.date_range(inicio, periods=comprimento, freq="D")
+    return pd.Series(valores, index=index, name=nome)
+
+
+def gerar_frota(n_series: int, comprimento: int, seed: int = 0, **kwargs) -> dict:
+    """
+    Gera um dicionário {id: série} com parâmetros variando por série.
+    """
+    rng = np.random.default_rng(seed)
+    series = {}
+    for i in range(n_series):
+        serie_id = f"sint-{i:06d}"
+        series[serie_id] = gerar_serie(
+            comprimento,
+            nivel=kwargs.get("nivel", float(rng.uniform(20, 60))),
+            tendencia=kwargs.get("tendencia", float(rng.normal(0, 0.01))),
+            amplitude_semanal=kwargs.get("amplitude_semanal", float(rng.uniform(0, 5))),
+            n_mudancas_nivel=kwargs.get("n_mudancas_nivel", int(rng.integers(0, 4))),
+            frac_outliers=kwargs.get("frac_outliers", 0.01),
+            ruido=kwargs.get("ruido", 2.0),
+            seed=int(rng.integers(0, 2**31)),
+            nome=serie_id
+        )
+    return series
@@ -1,69 +1,233 @@
 import os
+import time
+import uuid
+from contextlib import nullcontext
 import pandas as pd
 
-from model.questao1 import Questao1
-from model.questao2 import Questao2
-from model.questao3 import Questao3
-from model.questao4 import Questao4
-from model.questao5 import Questao5
-from model.relatorio import Relatorio
-
 import json
+from abstract.arquivos import escrita_atomica
 
 """
 Classe responsável por orquestrar todo o fluxo de trabalho da lista prática.
+Cada execução grava seus artefatos em um diretório próprio (output_dir/<run_id>), de forma
+atômica, e o Relatório recebe a configuração da execução diretamente, de modo que várias
+execuções concorrentes podem compartilhar o mesmo output_dir.
+Os módulos de cada etapa (e suas dependências pesadas: statsmodels, matplotlib,
+jinja2) só são importados quando a etapa é selecionada.
 """
 
+def gerar_run_id() -> str:
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
 class Controller:
 
-    def __init__(self, serie: pd.Series, freq: int, h: int = 12, output_dir: str = "output/"):
+    ETAPAS = ("questao1", "questao2", "questao3", "hierarquia", "questao4", "questao5", "relatorio")
+    ANALISES = ETAPAS[:-1]
+
+    def __init__(self, serie: pd.Series, freq: int, h: int = 12, output_dir: str = "output/",
+                 painel: pd.DataFrame = None, estrutura: pd.DataFrame = None, armazem_dir: str = None,
+                 sink=None, exportar_arquivos: bool = True, run_id: str = None, series_id: str = None,
+                 instrumentacao=None, etapas: list = None, gerar_graficos: bool = True,
+                 graficos=None, processos_graficos: int = None, isolar: bool = True):
         self.serie = serie
         self.freq = freq
         self.h = h
-        self.output_dir = output_dir
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
-            
-        # Salvar configurações para uso no Relatório
-        config = {"freq": self.freq, "h": self.h}
-        with open(os.path.join(self.output_dir, "config.json"), "w") as f:
-            json.dump(config, f)
+        self.run_id = run_id or gerar_run_id()
+        # isolar=False grava diretamente em output_dir (ex: Frota, que já isola por execução/série)
+        self.output_dir = os.path.join(output_dir, self.run_id) if isolar else output_dir
+        self.series_id = series_id or (str(serie.name) if serie.name is not None else "serie")
+        # Banco de resultados (opcional, ex: ResultadosSQLite); os arquivos continuam como exportação
+        self.sink = sink
+        self.exportar_arquivos = exportar_arquivos
+        # Instrumentação opcional: tempos, memória e bytes gravados por etapa (run_trace.json)
+        self.instrumentacao = instrumentacao
+        # Perfis cProfile ficam no diretório da execução (execuções concorrentes não se sobrescrevem)
+        if instrumentacao is not None and instrumentacao.diretorio_perfis is None:
+            instrumentacao.diretorio_perfis = self.output_dir
+        # Etapas selecionadas (por padrão todas) e geração de gráficos
+        self.etapas = set(etapas or self.ETAPAS)
+        invalidas = self.etapas - set(self.ETAPAS)
+        if invalidas:
+            raise ValueError(f"Etapas desconhecidas: {sorted(invalidas)}")
+        self.gerar_graficos = gerar_graficos
+        # As figuras são agendadas pelas análises e renderizadas depois, na etapa "graficos".
+        # No modo frota a etapa é compartilhada (graficos) e renderizada uma vez por lote.
+        self.graficos = None
+        self.graficos_proprios = graficos is None
+        if self.gerar_graficos:
+            from model.graficos import Graficos
+            self.graficos = graficos or Graficos(processos_graficos)
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        # Contexto da execução: passado ao Relatório e registrado em config.json
+        self.config = {"run_id": self.run_id, "series_id": self.series_id, "freq": self.freq, "h": self.h}
+        with escrita_atomica(os.path.join(self.output_dir, "config.json")) as f:
+            json.dump(self.config, f)
             
-        self.questao1 = Questao1(self.serie, self.freq, self.output_dir)
-        self.questao2 = Questao2(self.serie, self.output_dir)
-        self.questao3 = Questao3(self.serie, self.h, self.output_dir)
-        self.questao4 = Questao4(self.serie, self.output_dir)
-        self.questao5 = Questao5(self.serie, self.h, self.output_dir)
-        self.relatorio = Relatorio(self.output_dir)
+        self.questao1 = self.questao2 = self.questao3 = self.questao4 = self.questao5 = None
+        self.hierarquia = self.relatorio = None
+        if "questao1" in self.etapas:
+            from model.questao1 import Questao1
+            self.questao1 = Questao1(self.serie, self.freq, self.output_dir)
+        if "questao2" in self.etapas:
+            from model.questao2 import Questao2
+            self.questao2 = Questao2(self.serie, self.output_dir)
+        if "questao3" in self.etapas:
+            from model.questao3 import Questao3
+            self.questao3 = Questao3(self.serie, self.h, self.output_dir)
+        if "questao4" in self.etapas:
+            from model.questao4 import Questao4
+            self.questao4 = Questao4(self.serie, self.output_dir)
+        if "questao5" in self.etapas:
+            from model.questao5 import Questao5
+            self.questao5 = Questao5(self.serie, self.h, self.output_dir)
+        # Modo hierárquico (opcional): painel de séries folha + estrutura de níveis
+        if "hierarquia" in self.etapas and painel is not None and estrutura is not None:
+            from model.hierarquia import Hierarquia
+            self.hierarquia = Hierarquia(painel, estrutura, self.h, self.output_dir)
+        if "relatorio" in self.etapas:
+            from model.relatorio import Relatorio
+            self.relatorio = Relatorio(self.output_dir, self.sink, self.run_id, self.series_id, self.config)
+        # Armazém de modelos (opcional): persiste o estado SES ajustado na Questão 3
+        self.armazem = None
+        # Resultado de cada etapa executada: concluídas e falhas (etapa -> mensagem de erro)
+        self.concluidas = []
+        self.falhas = {}
+        if armazem_dir:
+            from model.armazem_modelos import ArmazemModelos
+            self.armazem = ArmazemModelos(armazem_dir)
+        self._configurar_sink()
+
+    def _analises(self) -> list:
+        analises = [self.questao1, self.questao2, self.questao3, self.questao4, self.questao5, self.hierarquia]
+        return [analise for analise in analises if analise is not None]
+
+    # direciona a persistência das análises para o sink e/ou arquivos
+    def _configurar_sink(self):
+        if self.relatorio is not None:
+            self.relatorio.instrumentacao = self.instrumentacao
+        if self.graficos is not None and self.graficos_proprios:
+            self.graficos.instrumentacao = self.instrumentacao
+        for analise in self._analises():
+            analise.instrumentacao = self.instrumentacao
+            analise.gerar_graficos = self.gerar_graficos
+            analise.graficos = self.graficos
+            analise.sink = self.sink
+            analise.exportar_arquivos = self.exportar_arquivos
+            analise.run_id = self.run_id
+            analise.series_id = self.series_id
+        if self.sink is not None:
+            self.sink.registrar_execucao(self.run_id, self.series_id, self.freq, self.h)
+
+    # executa uma etapa isolando falhas: um erro (ex: adfuller em série constante) é
+    # registrado, as linhas da etapa ainda não gravadas no banco são descartadas e as
+    # demais etapas prosseguem
+    def _executar(self, etapa: str, funcao):
+        if getattr(self, etapa) is None:
+            return
+        marca = self.sink.marcar() if self.sink is not None else None
+        try:
+            funcao()
+        except Exception as e:
+            if marca is not None:
+                self.sink.reverter(marca)
+            self.falhas[etapa] = f"{type(e).__name__}: {e}"
+            print(f"Falha na etapa {etapa} da série {self.series_id}: {self.falhas[etapa]}")
+            return
+        self.concluidas.append(etapa)
+
+    # mede uma etapa quando a execução é instrumentada
+    def _etapa(self, nome: str):
+        if self.instrumentacao is None:
+            return nullcontext()
+        return self.instrumentacao.etapa(nome)
 
     # executa a Questão 1: Período/Autocorrelação
     def _run_questao1(self):
-        self.questao1.run()
+        if self.questao1 is None:
+            return
+        with self._etapa("questao1"):
+            self.questao1.run()
 
     # executa a Questão 2: Estacionaridade (ADF e KPSS)
     def _run_questao2(self):
-        self.questao2.run()
+        if self.questao2 is None:
+            return
+        with self._etapa("questao2"):
+            self.questao2.run()
 
     # executa a Questão 3: Previsão SES
     def _run_questao3(self):
-        self.questao3.run()
+        if self.questao3 is None:
+            return
+        with self._etapa("questao3"):
+            self.questao3.run()
+            if self.armazem is not None:
+                self.armazem.salvar([self.questao3.estado], descricao="Questão 3")
+
+    # executa a previsão hierárquica reconciliada (quando configurada)
+    def _run_hierarquia(self):
+        if self.hierarquia is not None:
+            with self._etapa("hierarquia"):
+                self.hierarquia.run()
 
     # executa a Questão 4: Diagnóstico de Outliers
     def _run_questao4(self):
-        self.questao4.run()
+        if self.questao4 is None:
+            return
+        with self._etapa("questao4"):
+            self.questao4.run()
 
     # executa a Questão 5: Conclusão Geral
     def _run_questao5(self):
-        self.questao5.run()
+        if self.questao5 is None:
+            return
+        # O veredito usa o diagnóstico dos resíduos da Questão 4 (quando executada nesta execução)
+        if self.questao4 is not None:
+            self.questao5.diagnostico = self.questao4.diagnostico
+        with self._etapa("questao5"):
+            self.questao5.run()
+
+    # renderiza as figuras agendadas pelas análises (custo medido à parte das análises)
+    def _run_graficos(self):
+        if self.graficos is None or not self.graficos_proprios:
+            return
+        with self._etapa("graficos"):
+            self.graficos.run()
+        # As demais figuras já foram renderizadas; a etapa é registrada como falha
+        if self.graficos.falhas:
+            raise RuntimeError(f"{len(self.graficos.falhas)} figura(s) não renderizada(s): "
+                               f"{'; '.join(self.graficos.falhas.values())}")
 
     # gera o Relatório Final
     def _run_relatorio(self):
-        self.relatorio.run()
+        if self.relatorio is None:
+            return
+        with self._etapa("relatorio"):
+            self.relatorio.run()
+
+    # executa as análises (Questões 1-5), sem gerar o relatório
+    def run_analises(self):
+        for etapa in self.ANALISES:
+            self._executar(etapa, getattr(self, f"_run_{etapa}"))
+
+    # salva o trace estruturado da execução (quando instrumentada)
+    def _salvar_trace(self):
+        if self.instrumentacao is not None:
+            self.instrumentacao.salvar(os.path.join(self.output_dir, "run_trace.json"),
+                                       run_id=self.run_id, series_id=self.series_id)
 
     def run(self):
-        self._run_questao1()
-        self._run_questao2()
-        self._run_questao3()
-        self._run_questao4()
-        self._run_questao5()
-        self._run_relatorio()
\ No newline at end of file
+        total = self.instrumentacao.etapa("total", prefixar=False) if self.instrumentacao else nullcontext()
+        with total:
+            self.run_analises()
+            self._executar("graficos", self._run_graficos)
+            # O relatório consulta o banco: grava o lote antes de gerá-lo
+            if self.sink is not None:
+                self._executar("sink", self.sink.flush)
+            self._executar("relatorio", self._run_relatorio)
+        self._salvar_trace()
+        print(f"Artefatos da execução {self.run_id} salvos em: {self.output_dir}")
+        if self.falhas:
+            print(f"Etapas com falha: {sorted(self.falhas)}")
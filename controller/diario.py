@@ -0,0 +1,70 @@
+import os
+import time
+
+"""
+Diário de checkpoints do modo frota (append-only).
+Cada linha registra o resultado de uma etapa de uma série, separada por tabulações:
+    series_id  etapa  status  instante  mensagem
+com status "ok", "falha" ou "quarentena". Ao reabrir o diário de uma execução, as linhas
+são reaplicadas para saber o que já foi concluído, quantas vezes cada etapa falhou e quais
+séries estão em quarentena. Uma última linha incompleta (queda durante a escrita) é ignorada.
+"""
+
+class Diario:
+
+    def __init__(self, path: str):
+        self.path = path
+        self.concluidas = set()   # (series_id, etapa)
+        self.falhas = {}          # (series_id, etapa) -> tentativas com falha
+        self.erros = {}           # series_id -> última mensagem de erro
+        self.quarentena = set()
+        if os.path.exists(path):
+            self._carregar()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._arquivo = open(path, 'a')
+
+    def _carregar(self):
+        with open(self.path, 'r') as f:
+            for linha in f:
+                if not linha.endswith("\n"):
+                    break
+                campos = linha.rstrip("\n").split("\t")
+                if len(campos) != 5:
+                    continue
+                self._aplicar(campos[0], campos[1], campos[2], campos[4])
+
+    def _aplicar(self, series_id: str, etapa: str, status: str, mensagem: str):
+        chave = (series_id, etapa)
+        if status == "ok":
+            self.concluidas.add(chave)
+        elif status == "falha":
+            self.falhas[chave] = self.falhas.get(chave, 0) + 1
+            self.erros[series_id] = mensagem
+        elif status == "quarentena":
+            self.quarentena.add(series_id)
+
+    def registrar(self, series_id: str, etapa: str, status: str, mensagem: str = ""):
+        mensagem = " ".join(str(mensagem).split())
+        self._arquivo.write(f"{series_id}\t{etapa}\t{status}\t{time.time():.3f}\t{mensagem}\n")
+        self._aplicar(series_id, etapa, status, mensagem)
+
+    def concluida(self, series_id: str, etapa: str) -> bool:
+        return (series_id, etapa) in self.concluidas
+
+    def pendentes(self, series_id: str, etapas: list) -> list:
+        return [etapa for etapa in etapas if (series_id, etapa) not in self.concluidas]
+
+    def tentativas(self, series_id: str) -> int:
+        """
+        Maior número de falhas registradas entre as etapas da série.
+        """
+        return max((n for (sid, _), n in self.falhas.items() if sid == series_id), default=0)
+
+    def sincronizar(self):
+        # Torna os checkpoints do lote duráveis antes de prosseguir
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+
+    def fechar(self):
+        self.sincronizar()
+        self._arquivo.close()
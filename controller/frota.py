@@ -0,0 +1,236 @@
+import json
+import os
+import pandas as pd
+
+from controller.controller import Controller, gerar_run_id
+from controller.diario import Diario
+from abstract.instrumentacao import Instrumentacao, agregar_traces
+from abstract.arquivos import escrita_atomica
+from model.compilador_latex import CompiladorLatex
+
+"""
+Classe responsável por executar o fluxo da lista prática para muitas séries (modo frota).
+As séries podem ser um dicionário id -> pd.Series ou um PainelCompacto (matriz contígua
+float32/float64 com eixo temporal regular), materializado série a série apenas no lote
+em execução.
+Cada série tem seu próprio diretório de saída (output_dir/<run_id>/<series_id>); com um banco
+de resultados (sink), as inserções são gravadas em uma transação por lote de séries. As
+figuras do lote são renderizadas juntas, opcionalmente em um pool de processos
+(processos_graficos), e os relatórios do lote são compilados em um pool limitado de
+subprocessos pdflatex (processos_latex).
+Com um armazém de modelos (armazem_dir), os estados SES do lote são mesclados à versão corrente
+em uma única versão por lote.
+O progresso de cada série/etapa é registrado em um diário (diario.tsv): reexecutar a frota
+com o mesmo run_id retoma apenas o que ficou pendente, e séries com falha são tentadas
+novamente até max_tentativas vezes, depois ficam em quarentena sem interromper os lotes.
+"""
+
+class Frota:
+
+    def __init__(self, series: dict, freq: int, h: int = 12, output_dir: str = "output/",
+                 sink=None, exportar_arquivos: bool = True, tamanho_lote: int = 100, run_id: str = None,
+                 instrumentar: bool = False, medir_memoria: bool = True, perfilar: list = None,
+                 etapas: list = None, gerar_graficos: bool = True, processos_graficos: int = None,
+                 processos_latex: int = None, max_tentativas: int = 3, armazem_dir: str = None):
+        self.series = series
+        self.freq = freq
+        self.h = h
+        self.output_dir = output_dir
+        self.sink = sink
+        self.exportar_arquivos = exportar_arquivos
+        self.tamanho_lote = tamanho_lote
+        # Todas as séries da frota compartilham a mesma execução
+        self.run_id = run_id or gerar_run_id()
+        self.diretorio = os.path.join(output_dir, self.run_id)
+        # Instrumentação por série, agregada em percentis ao final (frota_trace_resumo.json)
+        self.instrumentar = instrumentar
+        self.medir_memoria = medir_memoria
+        self.perfilar = perfilar
+        self.traces = []
+        self.etapas = etapas
+        self.gerar_graficos = gerar_graficos
+        # Etapa de gráficos compartilhada pelas séries; o tempo de renderização é reportado à parte
+        self.graficos = None
+        if self.gerar_graficos:
+            from model.graficos import Graficos
+            self.graficos = Graficos(processos_graficos)
+        self.compilador = CompiladorLatex(processos_latex)
+        self.max_tentativas = max_tentativas
+        self.diario = None
+        # Armazém de modelos (opcional): os estados SES de cada lote são publicados em uma única versão
+        self.armazem = None
+        if armazem_dir:
+            from model.armazem_modelos import ArmazemModelos
+            self.armazem = ArmazemModelos(armazem_dir)
+        # Estados ainda não publicados (série -> EstadoSES), por falha na publicação de um lote anterior
+        self._estados_pendentes = {}
+
+    def _etapas(self) -> list:
+        # A frota não recebe painel/estrutura: a etapa hierárquica não se aplica
+        return [etapa for etapa in (self.etapas or Controller.ETAPAS) if etapa != "hierarquia"]
+
+    def _criar_controller(self, series_id: str, serie: pd.Series, etapas: list) -> Controller:
+        diretorio = os.path.join(self.diretorio, str(series_id))
+        instrumentacao = None
+        if self.instrumentar:
+            instrumentacao = Instrumentacao(self.medir_memoria, self.perfilar, diretorio)
+        controller = Controller(serie, self.freq, self.h, diretorio,
+                                sink=self.sink, exportar_arquivos=self.exportar_arquivos,
+                                run_id=self.run_id, series_id=str(series_id), instrumentacao=instrumentacao,
+                                etapas=etapas, gerar_graficos=self.gerar_graficos, graficos=self.graficos,
+                                isolar=False)
+        if controller.relatorio is not None:
+            controller.relatorio.compilador = self.compilador
+        return controller
+
+    def _lotes(self, ids: list):
+        for i in range(0, len(ids), self.tamanho_lote):
+            yield ids[i:i + self.tamanho_lote]
+
+    def _pendentes(self) -> list:
+        etapas = self._etapas()
+        return [series_id for series_id in self.series
+                if str(series_id) not in self.diario.quarentena and self.diario.pendentes(str(series_id), etapas)]
+
+    def _registrar(self, controller: Controller, etapas: tuple):
+        for etapa in etapas:
+            if etapa in controller.concluidas:
+                self.diario.registrar(controller.series_id, etapa, "ok")
+            elif etapa in controller.falhas:
+                self.diario.registrar(controller.series_id, etapa, "falha", controller.falhas[etapa])
+
+    def _falhar(self, controllers: list, etapas: tuple, erro: Exception):
+        """
+        Registra como falha (nos controllers) etapas já concluídas que precisam ser refeitas.
+        """
+        mensagem = f"{type(erro).__name__}: {erro}"
+        for controller in controllers:
+            for etapa in etapas:
+                if etapa in controller.concluidas:
+                    controller.concluidas.remove(etapa)
+                    controller.falhas[etapa] = mensagem
+
+    def _renderizar_graficos(self, controllers: list):
+        """
+        Renderiza as figuras do lote. Figuras com falha são registradas no diário (etapa
+        "graficos") sem interromper o lote nem provocar novas tentativas das análises.
+        """
+        try:
+            self.graficos.run()
+            falhas = self.graficos.falhas
+        except Exception as e:
+            # Falha do pool de renderização: afeta todas as séries do lote
+            print(f"Falha na renderização das figuras do lote: {type(e).__name__}: {e}")
+            falhas = {os.path.join(c.output_dir, ""): f"{type(e).__name__}: {e}" for c in controllers}
+        for controller in controllers:
+            erros = [erro for path, erro in falhas.items() if path.startswith(os.path.join(controller.output_dir, ""))]
+            if erros:
+                self.diario.registrar(controller.series_id, "graficos", "falha", "; ".join(erros))
+
+    def _publicar_estados(self, controllers: list):
+        """
+        Publica os estados SES do lote no armazém (uma versão). Em caso de falha, os estados
+        ficam pendentes e são publicados junto com os do próximo lote.
+        """
+        self._estados_pendentes.update({c.series_id: c.questao3.estado for c in controllers
+                                        if "questao3" in c.concluidas})
+        if not self._estados_pendentes:
+            return
+        try:
+            self.armazem.salvar(list(self._estados_pendentes.values()), descricao=f"Frota {self.run_id}")
+            self._estados_pendentes = {}
+        except Exception as e:
+            print(f"Falha ao publicar os estados no armazém de modelos: {type(e).__name__}: {e}")
+            for series_id in self._estados_pendentes:
+                self.diario.registrar(series_id, "armazem", "falha", f"{type(e).__name__}: {e}")
+
+    def _executar_lote(self, lote: list) -> list:
+        """
+        Executa as etapas pendentes de um lote e retorna as séries a tentar novamente.
+        """
+        etapas = self._etapas()
+        marca = self.sink.marcar() if self.sink is not None else None
+        controllers = [self._criar_controller(series_id, self.series[series_id],
+                                              self.diario.pendentes(str(series_id), etapas))
+                       for series_id in lote]
+        for controller in controllers:
+            controller.run_analises()
+        if self.graficos is not None:
+            self._renderizar_graficos(controllers)
+        # Uma transação por lote; os relatórios do lote consultam o banco já atualizado.
+        # Os checkpoints das análises só são registrados depois que o lote foi gravado.
+        gravado = True
+        if self.sink is not None:
+            try:
+                self.sink.flush()
+            except Exception as e:
+                # Nada do lote foi gravado: descarta as linhas do buffer e refaz as análises do lote
+                print(f"Falha ao gravar o lote no banco de resultados: {type(e).__name__}: {e}")
+                self.sink.reverter(marca)
+                self._falhar(controllers, Controller.ANALISES, e)
+                for controller in controllers:
+                    if controller.relatorio is not None:
+                        controller.falhas["relatorio"] = f"{type(e).__name__}: {e}"
+                gravado = False
+        if self.armazem is not None:
+            self._publicar_estados(controllers)
+        for controller in controllers:
+            self._registrar(controller, Controller.ANALISES)
+        # Sem o lote no banco os relatórios não são gerados e ficam para a próxima tentativa
+        if gravado:
+            for controller in controllers:
+                controller._executar("relatorio", controller._run_relatorio)
+            compilados = {r["tex"]: r for r in self.compilador.run()}
+            for controller in controllers:
+                if controller.relatorio is not None and \
+                        compilados.get(controller.relatorio.file_path_report, {}).get("status") == "erro":
+                    self._falhar([controller], ("relatorio",), RuntimeError("erro na compilação do PDF"))
+        repetir = []
+        for controller in controllers:
+            self._registrar(controller, ("relatorio",))
+            controller._salvar_trace()
+            if controller.instrumentacao is not None:
+                self.traces.append(controller.instrumentacao.trace(series_id=controller.series_id))
+            if controller.falhas and self.diario.tentativas(controller.series_id) >= self.max_tentativas:
+                self.diario.registrar(controller.series_id, "*", "quarentena", controller.falhas)
+                print(f"Série {controller.series_id} em quarentena após {self.max_tentativas} tentativas: "
+                      f"{controller.falhas}")
+            elif controller.falhas:
+                repetir.append(controller.series_id)
+        self.diario.sincronizar()
+        return repetir
+
+    def run(self):
+        self.diario = Diario(os.path.join(self.diretorio, "diario.tsv"))
+        try:
+            pendentes = self._pendentes()
+            concluidas = len(self.series) - len(pendentes)
+            if concluidas:
+                print(f"Retomando a execução {self.run_id}: {concluidas} séries já concluídas ou em quarentena.")
+            # Cada rodada reexecuta só as etapas pendentes das séries que falharam; uma série
+            # que sempre falha chega à quarentena em no máximo max_tentativas rodadas
+            while pendentes:
+                repetir = set()
+                for lote in self._lotes(pendentes):
+                    repetir.update(self._executar_lote(lote))
+                pendentes = [series_id for series_id in pendentes if str(series_id) in repetir]
+        finally:
+            self.diario.fechar()
+        if self.diario.quarentena:
+            print(f"{len(self.diario.quarentena)} séries em quarentena (ver {self.diario.path}).")
+        self._salvar_resumo_traces()
+
+    def _salvar_resumo_traces(self):
+        """
+        Agrega os traces das séries em percentis por etapa e indica a etapa de cauda.
+        """
+        if not self.traces:
+            return
+        resumo = agregar_traces(self.traces)
+        resumo["run_id"] = self.run_id
+        if self.graficos is not None:
+            resumo["graficos_s"] = self.graficos.tempo_renderizacao
+        path = os.path.join(self.diretorio, "frota_trace_resumo.json")
+        with escrita_atomica(path) as f:
+            json.dump(resumo, f, indent=2)
+        print(f"Resumo dos traces da frota salvo em: {path} (etapa de cauda: {resumo['etapa_cauda']})")
@@ -0,0 +1,308 @@
+import argparse
+import csv
+import glob
+import io
+import math
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from abstract.arquivos import escrita_atomica
+from controller.controller import Controller, gerar_run_id
+
+"""
+Modo vigia (daemon): acompanha um diretório de CSVs de séries e mantém os artefatos atualizados
+à medida que novas linhas são acrescentadas, sem recalcular tudo a cada chegada de dados.
+
+Para cada arquivo guarda o deslocamento (em bytes) do fim da última linha completa lida. A cada
+verificação apenas a cauda acrescentada é lida e interpretada, e:
+    * o estado SES da Questão 3 avança com as novas observações (EstadoSES.atualizar), e o estado
+      (q3_ses_state.json) e a previsão a partir da última observação (q3_forecast_latest.csv) são regravados;
+    * os resíduos de um passo do SES da Questão 4 atualizam a média e o desvio padrão pelo algoritmo
+      de Welford; as novas observações são testadas pelo critério 3-sigma e os outliers já
+      listados são reavaliados com os novos limites (q4_outliers.csv, q4_metrics.csv, q4_interpretation.txt);
+    * o relatório é regenerado (e recompilado apenas se o .tex ou as figuras mudaram, ver model/compilador_latex.py).
+As análises que dependem da série inteira (ACF/PACF, ADF/KPSS, reajuste de alpha, holdout da Q3,
+diagnóstico dos resíduos, figuras) são recalculadas pelo pipeline completo (Controller) quando o arquivo aparece, quando é
+reescrito ou truncado, quando chegam datas repetidas ou fora de ordem e, opcionalmente, a cada
+`reajustar_a_cada` observações novas. Ao (re)iniciar o vigia, cada arquivo passa pelo pipeline completo.
+
+Uso:
+    python -m controller.vigia dataset/ --output-dir output/vigia --freq 7 --h 7
+"""
+
+class EstatisticasResiduos:
+    """
+    Média e desvio padrão amostral dos resíduos atualizados um a um (algoritmo de Welford).
+    """
+
+    def __init__(self, n: int = 0, media: float = 0.0, m2: float = 0.0):
+        self.n = n
+        self.media = media
+        self.m2 = m2
+
+    @classmethod
+    def from_residuos(cls, residuos) -> "EstatisticasResiduos":
+        residuos = np.asarray(residuos, dtype=float)
+        residuos = residuos[~np.isnan(residuos)]
+        if len(residuos) == 0:
+            return cls()
+        media = float(residuos.mean())
+        return cls(len(residuos), media, float(((residuos - media) ** 2).sum()))
+
+    def atualizar(self, residuo: float):
+        if residuo != residuo:
+            return
+        self.n += 1
+        delta = residuo - self.media
+        self.media += delta / self.n
+        self.m2 += delta * (residuo - self.media)
+
+    @property
+    def desvio(self) -> float:
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else float("nan")
+
+    def limites(self, k: float = 3.0):
+        return self.media - k * self.desvio, self.media + k * self.desvio
+
+
+class Acompanhamento:
+    """
+    Estado de um arquivo acompanhado: posição de leitura e estado incremental das análises.
+    """
+
+    def __init__(self, path: str, series_id: str):
+        self.path = path
+        self.series_id = series_id
+        self.inode = None
+        self.deslocamento = 0
+        self.ultimo = None            # último instante ingerido
+        self.controller = None        # Controller do último processamento completo
+        self.estado_q4 = None         # EstadoSES da Questão 4 (série completa)
+        self.estatisticas = None      # EstatisticasResiduos dos resíduos da Questão 4
+        self.outliers = None          # pd.Series data -> resíduo
+        self.novas = 0                # observações ingeridas desde o último processamento completo
+
+    @property
+    def incremental(self) -> bool:
+        return self.estado_q4 is not None and self.controller.questao3.estado is not None
+
+
+class Vigia:
+
+    def __init__(self, diretorio: str, freq: int, h: int = 7, output_dir: str = "output/vigia/",
+                 freq_indice: str = "D", padrao: str = "*.csv", intervalo: float = 1.0,
+                 reajustar_a_cada: int = None, gerar_graficos: bool = True):
+        self.diretorio = diretorio
+        self.freq = freq
+        self.h = h
+        self.output_dir = output_dir
+        self.freq_indice = freq_indice
+        self.padrao = padrao
+        self.intervalo = intervalo
+        self.reajustar_a_cada = reajustar_a_cada
+        self.gerar_graficos = gerar_graficos
+        self.acompanhados = {}
+        # Arquivos cujo processamento falhou -> (inode, tamanho, mtime) no momento da falha
+        self.falhas = {}
+
+    def _arquivos(self) -> list:
+        return sorted(glob.glob(os.path.join(self.diretorio, self.padrao)))
+
+    # processamento completo: lê o arquivo inteiro e executa o pipeline (Controller)
+    def _reprocessar(self, acompanhamento: Acompanhamento):
+        with open(acompanhamento.path, 'rb') as f:
+            inode = os.fstat(f.fileno()).st_ino
+            dados = f.read()
+        # Apenas linhas completas são interpretadas: uma última linha ainda em escrita (sem quebra)
+        # fica para a próxima leitura da cauda, já com seu valor final
+        deslocamento = dados.rfind(b"\n") + 1
+        serie = pd.read_csv(io.BytesIO(dados[:deslocamento]), header=0, index_col=0, parse_dates=True).squeeze("columns")
+        # Lacunas no eixo viram NaN (tratadas nativamente pelos kernels)
+        serie = serie.asfreq(self.freq_indice)
+
+        diretorio = os.path.join(self.output_dir, acompanhamento.series_id)
+        controller = Controller(serie, self.freq, self.h, diretorio, run_id=gerar_run_id(),
+                                series_id=acompanhamento.series_id, gerar_graficos=self.gerar_graficos,
+                                isolar=False)
+        controller.run()
+
+        acompanhamento.inode = inode
+        acompanhamento.deslocamento = deslocamento
+        acompanhamento.ultimo = serie.index[-1]
+        acompanhamento.controller = controller
+        acompanhamento.novas = 0
+        acompanhamento.estado_q4 = acompanhamento.estatisticas = acompanhamento.outliers = None
+        if "questao3" in controller.falhas or "questao4" in controller.falhas:
+            print(f"{acompanhamento.series_id}: estado incremental indisponível; "
+                  f"a próxima alteração reprocessa o arquivo inteiro")
+            return
+        questao4 = controller.questao4
+        acompanhamento.estado_q4 = questao4.estado
+        acompanhamento.estatisticas = EstatisticasResiduos.from_residuos(questao4.residuos)
+        inferior, superior = acompanhamento.estatisticas.limites()
+        acompanhamento.outliers = questao4.residuos[(questao4.residuos > superior) | (questao4.residuos < inferior)]
+        self._salvar_previsao(acompanhamento)
+
+    def _ler_cauda(self, acompanhamento: Acompanhamento):
+        """
+        Lê apenas os bytes acrescentados desde o último deslocamento e devolve as linhas completas
+        como (instante, valor). Devolve None quando o arquivo precisa ser reprocessado
+        (reescrito, truncado ou com datas repetidas/fora de ordem).
+        """
+        with open(acompanhamento.path, 'rb') as f:
+            estado = os.fstat(f.fileno())
+            if estado.st_ino != acompanhamento.inode or estado.st_size < acompanhamento.deslocamento:
+                return None
+            if estado.st_size == acompanhamento.deslocamento:
+                return []
+            f.seek(acompanhamento.deslocamento)
+            cauda = f.read()
+        completas = cauda[:cauda.rfind(b"\n") + 1]
+        linhas = []
+        ultimo = acompanhamento.ultimo
+        for campos in csv.reader(io.StringIO(completas.decode("utf-8"))):
+            if not campos or not campos[0].strip():
+                continue
+            instante = pd.Timestamp(campos[0])
+            if instante <= ultimo:
+                return None
+            valor = campos[1].strip() if len(campos) > 1 else ""
+            linhas.append((instante, float(valor) if valor else float("nan")))
+            ultimo = instante
+        acompanhamento.deslocamento += len(completas)
+        return linhas
+
+    # avança os estados com as novas observações e regrava apenas os artefatos afetados
+    def _atualizar(self, acompanhamento: Acompanhamento, linhas: list):
+        controller = acompanhamento.controller
+        valores = [valor for _, valor in linhas]
+
+        # Questão 3: estado SES e previsão a partir da última observação
+        controller.questao3.estado.atualizar(valores)
+        controller.questao3.salvar_estado()
+
+        # Questão 4: resíduo de um passo de cada nova observação, antes de atualizar o nível
+        estatisticas = acompanhamento.estatisticas
+        novos = {}
+        for instante, valor in linhas:
+            residuo = valor - acompanhamento.estado_q4.nivel
+            estatisticas.atualizar(residuo)
+            acompanhamento.estado_q4.atualizar([valor])
+            novos[instante] = residuo
+        novos = pd.Series(novos, dtype=float)
+        inferior, superior = estatisticas.limites()
+        candidatos = pd.concat([acompanhamento.outliers, novos]) if not acompanhamento.outliers.empty else novos
+        acompanhamento.outliers = candidatos[(candidatos > superior) | (candidatos < inferior)]
+        controller.questao4.salvar_resultados(acompanhamento.outliers, estatisticas.desvio)
+
+        acompanhamento.ultimo = linhas[-1][0]
+        acompanhamento.novas += len(linhas)
+        self._salvar_previsao(acompanhamento)
+        if controller.relatorio is not None:
+            controller.relatorio.run()
+
+    def _salvar_previsao(self, acompanhamento: Acompanhamento):
+        estado = acompanhamento.controller.questao3.estado
+        previsao = estado.prever(self.h)
+        datas = pd.date_range(acompanhamento.ultimo, periods=self.h + 1, freq=self.freq_indice)[1:]
+        df = pd.DataFrame({
+            "Date": datas.strftime("%Y-%m-%d"),
+            "Forecast": previsao["forecast"],
+            "Lower": previsao["lower"],
+            "Upper": previsao["upper"]
+        })
+        path = os.path.join(acompanhamento.controller.output_dir, "q3_forecast_latest.csv")
+        with escrita_atomica(path, newline='') as f:
+            df.to_csv(f, index=False)
+        print(f"Previsão atualizada salva em: {path}")
+
+    def _verificar_arquivo(self, path: str) -> str:
+        series_id = os.path.splitext(os.path.basename(path))[0]
+        acompanhamento = self.acompanhados.get(path)
+        if acompanhamento is None:
+            acompanhamento = self.acompanhados[path] = Acompanhamento(path, series_id)
+            self._reprocessar(acompanhamento)
+            return "reprocessado"
+        linhas = self._ler_cauda(acompanhamento)
+        if linhas is None or (linhas and not acompanhamento.incremental):
+            self._reprocessar(acompanhamento)
+            return "reprocessado"
+        if not linhas:
+            return "inalterado"
+        if self.reajustar_a_cada and acompanhamento.novas + len(linhas) >= self.reajustar_a_cada:
+            self._reprocessar(acompanhamento)
+            return "reprocessado"
+        self._atualizar(acompanhamento, linhas)
+        print(f"{series_id}: {len(linhas)} nova(s) observação(ões) até {acompanhamento.ultimo.date()}")
+        return "atualizado"
+
+    def verificar(self) -> dict:
+        """
+        Uma varredura do diretório. Devolve a contagem de arquivos por situação
+        (reprocessado, atualizado, inalterado, falha). Uma falha em um arquivo não
+        interrompe os demais; o arquivo só é reprocessado quando mudar (tamanho, mtime ou inode).
+        """
+        situacoes = {}
+        arquivos = self._arquivos()
+        for path in list(self.acompanhados):
+            if path not in arquivos:
+                del self.acompanhados[path]
+        for path in list(self.falhas):
+            if path not in arquivos:
+                del self.falhas[path]
+        for path in arquivos:
+            assinatura = None
+            try:
+                estado = os.stat(path)
+                assinatura = (estado.st_ino, estado.st_size, estado.st_mtime_ns)
+                if self.falhas.get(path) == assinatura:
+                    situacao = "falha"
+                else:
+                    self.falhas.pop(path, None)
+                    situacao = self._verificar_arquivo(path)
+            except Exception as e:
+                print(f"Falha ao processar {path}: {type(e).__name__}: {e}")
+                self.acompanhados.pop(path, None)
+                # Assinatura anterior ao processamento: dados acrescentados durante ele geram nova tentativa
+                self.falhas[path] = assinatura
+                situacao = "falha"
+            situacoes[situacao] = situacoes.get(situacao, 0) + 1
+        return situacoes
+
+    def run(self, ciclos: int = None):
+        print(f"Vigiando {os.path.join(self.diretorio, self.padrao)} a cada {self.intervalo}s")
+        ciclo = 0
+        try:
+            while ciclos is None or ciclo < ciclos:
+                inicio = time.monotonic()
+                self.verificar()
+                ciclo += 1
+                time.sleep(max(0.0, self.intervalo - (time.monotonic() - inicio)))
+        except KeyboardInterrupt:
+            print("Vigia encerrado.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Modo vigia: atualiza os artefatos quando os CSVs recebem novas linhas.")
+    parser.add_argument("diretorio", nargs="?", default="dataset/", help="Diretório com os CSVs das séries")
+    parser.add_argument("--padrao", default="*.csv", help="Padrão dos arquivos acompanhados")
+    parser.add_argument("--output-dir", default="output/vigia/", help="Diretório de saída (um subdiretório por série)")
+    parser.add_argument("--freq", type=int, default=7, help="Frequência sazonal")
+    parser.add_argument("--h", type=int, default=7, help="Horizonte de previsão")
+    parser.add_argument("--freq-indice", default="D", help="Frequência do índice temporal (ex: D, MS)")
+    parser.add_argument("--intervalo", type=float, default=1.0, help="Intervalo entre verificações (segundos)")
+    parser.add_argument("--reajustar-a-cada", type=int, default=None,
+                        help="Reexecuta o pipeline completo a cada N observações novas")
+    parser.add_argument("--sem-graficos", action="store_true", help="Não renderiza as figuras")
+    parser.add_argument("--ciclos", type=int, default=None, help="Número de verificações (por padrão, sem fim)")
+    args = parser.parse_args()
+
+    vigia = Vigia(args.diretorio, args.freq, args.h, args.output_dir, args.freq_indice, args.padrao,
+                  args.intervalo, args.reajustar_a_cada, not args.sem_graficos)
+    vigia.run(args.ciclos)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,70 @@
+import argparse
 import os
 import pandas as pd
 from controller.controller import Controller
 
-def main():
+"""
+Ponto de entrada (CLI) da aplicação.
+As dependências pesadas (statsmodels, matplotlib, jinja2) só são
+carregadas para as etapas selecionadas, de modo que execuções parciais iniciam rapidamente.
+
+Exemplos:
+    python main.py
+    python main.py dataset/daily-total-female-births.csv --freq 7 --h 7
+    python main.py --etapas questao3 --sem-graficos
+"""
+
+
+def parse_args(argv=None):
     base_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path = os.path.join(base_dir, "dataset", "daily-total-female-births.csv")
-    
-    # Carregar dados
-    serie = pd.read_csv(file_path, header=0, index_col=0, parse_dates=True).squeeze()
-    serie.index.freq = 'D' # Define frequência diária para evitar ValueWarning
-    
+    parser = argparse.ArgumentParser(description="Previsão e diagnóstico de séries temporais (SES).")
+    parser.add_argument("entrada", nargs="?", default=os.path.join(base_dir, "dataset", "daily-total-female-births.csv"),
+                        help="CSV com a coluna de datas (índice) e a coluna de valores")
     # define a frequência para capturar sazonalidade semanal.
-    freq = 7
-
+    parser.add_argument("--freq", type=int, default=7, help="Frequência sazonal (ex: 7 para diário com ciclo semanal)")
     # define o horizonte de previsão h=7 (uma semana)
-    h = 7
-    
+    parser.add_argument("--h", type=int, default=7, help="Horizonte de previsão")
+    parser.add_argument("--freq-indice", default="D", help="Frequência do índice temporal (ex: D, MS)")
+    parser.add_argument("--etapas", nargs="+", choices=Controller.ETAPAS, default=None,
+                        help="Etapas a executar (por padrão todas)")
+    parser.add_argument("--output-dir", default="output/", help="Diretório de saída")
+    parser.add_argument("--sem-graficos", action="store_true", help="Não renderiza as figuras")
+    parser.add_argument("--processos-graficos", type=int, default=None,
+                        help="Renderiza as figuras em um pool com N processos")
+    parser.add_argument("--banco", help="Grava os resultados também em um banco SQLite")
+    parser.add_argument("--armazem", help="Diretório do armazém de modelos (estado SES)")
+    parser.add_argument("--instrumentar", action="store_true", help="Salva o trace de tempos/memória (run_trace.json)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Carregar dados
+    serie = pd.read_csv(args.entrada, header=0, index_col=0, parse_dates=True).squeeze()
+    # Define a frequência do índice; datas ausentes viram NaN no eixo (tratadas nativamente pelos kernels)
+    serie = serie.asfreq(args.freq_indice)
+
+    sink = None
+    if args.banco:
+        from model.resultados_sqlite import ResultadosSQLite
+        sink = ResultadosSQLite(args.banco)
+
+    instrumentacao = None
+    if args.instrumentar:
+        from abstract.instrumentacao import Instrumentacao
+        instrumentacao = Instrumentacao()
+
     # executa o controlador
-    controller = Controller(serie, freq, h)
+    controller = Controller(serie, args.freq, args.h, args.output_dir, armazem_dir=args.armazem, sink=sink,
+                            instrumentacao=instrumentacao, etapas=args.etapas,
+                            gerar_graficos=not args.sem_graficos, processos_graficos=args.processos_graficos)
     controller.run()
 
+    if sink is not None:
+        sink.fechar()
+    # código de saída diferente de zero quando alguma etapa falhou
+    return 1 if controller.falhas else 0
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    raise SystemExit(main())
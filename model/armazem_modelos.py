@@ -0,0 +1,269 @@
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+import numpy as np
+from abstract.arquivos import aplicar_umask, escrita_atomica
+from model.estado_ses import EstadoSES
+
+"""
+Armazém compacto e versionado de estados SES ajustados.
+Cada versão é um diretório com arrays binários (.npy) carregados via memory-map:
+
+    <raiz>/ATUAL                 nome da versão corrente
+    <raiz>/v0001/estados.npy     registros (alpha, níveis, desvio dos resíduos, n, instante do ajuste)
+    <raiz>/v0001/ids.npy         ids das séries (bytes de largura fixa)
+    <raiz>/v0001/hashes.npy      hash de 64 bits de cada id
+    <raiz>/v0001/indice.npy      tabela hash (endereçamento aberto) id -> posição
+    <raiz>/v0001/meta.json
+
+A busca por id é O(1) (hash + sondagem linear na tabela mapeada em memória) e a carga de
+uma versão não lê os registros para a memória, permitindo abrir milhões de entradas instantaneamente.
+Cada nova versão parte da corrente (os estados das séries gravadas substituem os anteriores e as
+demais séries são mantidas). A gravação é serializada por uma trava de arquivo (<raiz>/.trava), e a
+versão é montada em um diretório temporário exclusivo e publicada com rename, tentando o número
+seguinte se o nome já estiver ocupado.
+"""
+
+DTYPE_ESTADO = np.dtype([
+    ("alpha", "f8"),
+    ("nivel_inicial", "f8"),
+    ("nivel_final", "f8"),
+    ("desvio_residuos", "f8"),
+    ("n", "i8"),
+    ("ajustado_em", "f8")
+])
+
+_FNV_OFFSET = np.uint64(0xcbf29ce484222325)
+_FNV_PRIME = np.uint64(0x100000001b3)
+
+
+def _hash_ids(ids: np.ndarray) -> np.ndarray:
+    """
+    Hash FNV-1a de 64 bits, vetorizado sobre um array de bytes de largura fixa.
+    """
+    largura = ids.dtype.itemsize
+    matriz = np.frombuffer(ids.tobytes(), dtype=np.uint8).reshape(len(ids), largura)
+    h = np.full(len(ids), _FNV_OFFSET, dtype=np.uint64)
+    for j in range(largura):
+        h ^= matriz[:, j].astype(np.uint64)
+        h *= _FNV_PRIME
+    return h
+
+
+def _hash_chave(chave: bytes, largura: int) -> int:
+    """
+    Mesmo hash de _hash_ids para uma única chave (em Python puro, sem custo de arrays).
+    """
+    h = int(_FNV_OFFSET)
+    for b in chave.ljust(largura, b"\0"):
+        h = ((h ^ b) * int(_FNV_PRIME)) & 0xFFFFFFFFFFFFFFFF
+    return h
+
+
+def _construir_indice(hashes: np.ndarray) -> np.ndarray:
+    """
+    Monta a tabela hash com sondagem linear (fator de carga <= 0.5) de forma vetorizada:
+    a cada rodada os itens cujo slot está livre são inseridos (um por slot) e os demais
+    avançam para o slot seguinte. Slots guardam posição + 1 (0 = vazio).
+    """
+    capacidade = 1 << max(4, int(2 * max(len(hashes), 1) - 1).bit_length())
+    mascara = np.uint64(capacidade - 1)
+    tabela = np.zeros(capacidade, dtype=np.int64)
+    pendentes = np.arange(len(hashes), dtype=np.int64)
+    slots = (hashes & mascara).astype(np.int64)
+    while len(pendentes):
+        livres = tabela[slots] == 0
+        candidatos = np.flatnonzero(livres)
+        # Apenas o primeiro candidato de cada slot é inserido nesta rodada
+        _, primeiros = np.unique(slots[candidatos], return_index=True)
+        inseridos = candidatos[primeiros]
+        tabela[slots[inseridos]] = pendentes[inseridos] + 1
+        restantes = np.ones(len(pendentes), dtype=bool)
+        restantes[inseridos] = False
+        pendentes = pendentes[restantes]
+        slots = (slots[restantes] + 1) & (capacidade - 1)
+    return tabela
+
+
+class VersaoArmazem:
+
+    def __init__(self, diretorio: str, mmap: bool = True):
+        modo = "r" if mmap else None
+        self.diretorio = diretorio
+        with open(os.path.join(diretorio, "meta.json"), 'r') as f:
+            self.meta = json.load(f)
+        self.estados = np.load(os.path.join(diretorio, "estados.npy"), mmap_mode=modo)
+        self.ids = np.load(os.path.join(diretorio, "ids.npy"), mmap_mode=modo)
+        self.hashes = np.load(os.path.join(diretorio, "hashes.npy"), mmap_mode=modo)
+        self.indice = np.load(os.path.join(diretorio, "indice.npy"), mmap_mode=modo)
+        self._mascara = len(self.indice) - 1
+
+    def __len__(self) -> int:
+        return len(self.estados)
+
+    def __contains__(self, serie_id: str) -> bool:
+        return self.posicao(serie_id) >= 0
+
+    def posicao(self, serie_id: str) -> int:
+        """
+        Retorna a posição do id nos arrays (ou -1 se ausente).
+        """
+        chave = str(serie_id).encode("utf-8")
+        if len(chave) > self.ids.dtype.itemsize:
+            return -1  # id maior que a largura armazenada
+        h = _hash_chave(chave, self.ids.dtype.itemsize)
+        slot = h & self._mascara
+        while True:
+            pos = int(self.indice[slot]) - 1
+            if pos < 0:
+                return -1
+            if int(self.hashes[pos]) == h and self.ids[pos] == chave:
+                return pos
+            slot = (slot + 1) & self._mascara
+
+    def obter(self, serie_id: str) -> EstadoSES:
+        """
+        Reconstrói o estado SES de uma série, pronto para prever sem reajuste.
+        """
+        pos = self.posicao(serie_id)
+        if pos < 0:
+            return None
+        r = self.estados[pos]
+        return EstadoSES(serie_id, r["alpha"], r["nivel_final"], r["desvio_residuos"], r["n"],
+                         r["nivel_inicial"], r["ajustado_em"])
+
+    def iterar(self):
+        """
+        Percorre todos os estados em ordem de posição, lendo os registros de uma vez (sem busca por id).
+        """
+        registros = np.asarray(self.estados).tolist()
+        for serie_id, (alpha, nivel_inicial, nivel_final, desvio, n, ajustado_em) in zip(self.ids.tolist(), registros):
+            yield EstadoSES(serie_id.decode("utf-8"), alpha, nivel_final, desvio, n, nivel_inicial, ajustado_em)
+
+
+class ArmazemModelos:
+
+    def __init__(self, raiz: str):
+        self.raiz = raiz
+        if not os.path.exists(self.raiz):
+            os.makedirs(self.raiz)
+
+    def versoes(self) -> list:
+        # Ordem numérica (v10000 vem depois de v9999)
+        return sorted((d for d in os.listdir(self.raiz) if d.startswith("v") and d[1:].isdigit()),
+                      key=lambda d: int(d[1:]))
+
+    @contextmanager
+    def _trava(self):
+        """
+        Trava exclusiva do armazém: serializa a leitura da versão corrente, a mescla e a publicação.
+        """
+        with open(os.path.join(self.raiz, ".trava"), 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _publicar(self, temporario: str, meta: dict) -> str:
+        """
+        Renomeia o diretório temporário para a próxima versão livre (rename falha se o nome já
+        existe) e retorna o nome da versão.
+        """
+        versoes = self.versoes()
+        numero = int(versoes[-1][1:]) + 1 if versoes else 1
+        while True:
+            versao = f"v{numero:04d}"
+            with open(os.path.join(temporario, "meta.json"), 'w') as f:
+                json.dump({"versao": versao, **meta}, f, indent=2)
+            try:
+                os.rename(temporario, os.path.join(self.raiz, versao))
+                return versao
+            except OSError:
+                if not os.path.exists(os.path.join(self.raiz, versao)):
+                    raise
+                numero += 1
+
+    def versao_atual(self) -> str:
+        path = os.path.join(self.raiz, "ATUAL")
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                return f.read().strip()
+        versoes = self.versoes()
+        return versoes[-1] if versoes else None
+
+    def salvar_arrays(self, ids, alpha, nivel_inicial, nivel_final, desvio_residuos, n, ajustado_em=None,
+                      descricao: str = "", mesclar: bool = True) -> str:
+        """
+        Grava uma nova versão a partir de arrays paralelos (uma posição por série).
+        Com mesclar=True, as séries da versão corrente que não foram informadas são mantidas.
+        """
+        ids = np.asarray([str(i).encode("utf-8") for i in ids])
+        if len(np.unique(ids)) != len(ids):
+            raise ValueError("ids de séries duplicados no armazém de modelos")
+
+        estados = np.empty(len(ids), dtype=DTYPE_ESTADO)
+        estados["alpha"] = alpha
+        estados["nivel_inicial"] = nivel_inicial
+        estados["nivel_final"] = nivel_final
+        estados["desvio_residuos"] = desvio_residuos
+        estados["n"] = n
+        estados["ajustado_em"] = time.time() if ajustado_em is None else ajustado_em
+
+        with self._trava():
+            if mesclar and self.versao_atual() is not None:
+                atual = self.carregar()
+                mantidos = ~np.isin(atual.ids, ids)
+                ids = np.concatenate([atual.ids[mantidos], ids])
+                estados = np.concatenate([atual.estados[mantidos], estados])
+
+            hashes = _hash_ids(ids)
+            indice = _construir_indice(hashes)
+
+            # Diretório temporário exclusivo: execuções concorrentes nunca escrevem no mesmo lugar
+            temporario = tempfile.mkdtemp(prefix=".versao-", dir=self.raiz)
+            try:
+                np.save(os.path.join(temporario, "estados.npy"), estados)
+                np.save(os.path.join(temporario, "ids.npy"), ids)
+                np.save(os.path.join(temporario, "hashes.npy"), hashes)
+                np.save(os.path.join(temporario, "indice.npy"), indice)
+                aplicar_umask(temporario)
+                versao = self._publicar(temporario, {"criado_em": time.time(), "n_series": len(ids),
+                                                     "descricao": descricao})
+            except BaseException:
+                shutil.rmtree(temporario, ignore_errors=True)
+                raise
+            with escrita_atomica(os.path.join(self.raiz, "ATUAL")) as f:
+                f.write(versao)
+        diretorio = os.path.join(self.raiz, versao)
+        print(f"Armazém de modelos: versão {versao} salva com {len(ids)} séries em: {diretorio}")
+        return versao
+
+    def salvar(self, estados: list, descricao: str = "", mesclar: bool = True) -> str:
+        """
+        Grava uma nova versão a partir de uma lista de EstadoSES.
+        """
+        return self.salvar_arrays(
+            [e.serie_id for e in estados],
+            [e.alpha for e in estados],
+            [e.nivel_inicial for e in estados],
+            [e.nivel for e in estados],
+            [e.sigma for e in estados],
+            [e.n for e in estados],
+            [e.ajustado_em for e in estados],
+            descricao,
+            mesclar
+        )
+
+    def carregar(self, versao: str = None, mmap: bool = True) -> VersaoArmazem:
+        """
+        Abre uma versão (por padrão a corrente) via memory-map.
+        """
+        versao = versao or self.versao_atual()
+        if versao is None:
+            raise FileNotFoundError(f"Nenhuma versão encontrada no armazém: {self.raiz}")
+        return VersaoArmazem(os.path.join(self.raiz, versao), mmap)
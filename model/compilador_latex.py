@@ -0,0 +1,150 @@
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from abstract.arquivos import escrita_atomica
+
+"""
+Compilação incremental dos relatórios LaTeX.
+Cada compilação roda em um diretório temporário próprio (-output-directory), semeado com o
+.aux anterior; uma nova passagem do pdflatex só é feita quando o .aux muda, e a compilação é
+pulada quando o hash do .tex e das figuras incluídas (\includegraphics) é o mesmo do último
+PDF gerado. No modo frota, os relatórios
+são compilados em um pool limitado de subprocessos.
+"""
+
+MAX_PASSADAS = 3
+_INCLUDEGRAPHICS = re.compile(r"\\includegraphics\s*(?:\[[^\]]*\])?\s*\{([^}]*)\}")
+_EXTENSOES_FIGURA = (".pdf", ".png", ".jpg", ".jpeg", ".eps")
+
+
+def _hash_arquivo(path: str) -> str:
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _hash_entradas(tex_path: str) -> str:
+    """
+    Hash do .tex e das figuras que ele inclui: uma figura regenerada com o .tex inalterado
+    também exige recompilar o PDF.
+    """
+    diretorio = os.path.dirname(os.path.abspath(tex_path))
+    with open(tex_path, 'rb') as f:
+        conteudo = f.read()
+    h = hashlib.sha256(conteudo)
+    for nome in _INCLUDEGRAPHICS.findall(conteudo.decode("utf-8", errors="ignore")):
+        nome = nome.strip()
+        # Sem extensão, o pdflatex procura a figura nas extensões usuais
+        candidatos = [nome] if os.path.splitext(nome)[1] else [nome + ext for ext in _EXTENSOES_FIGURA]
+        caminhos = [os.path.join(diretorio, c) for c in candidatos]
+        caminho = next((c for c in caminhos if os.path.exists(c)), None)
+        h.update(f"\0{nome}\0{_hash_arquivo(caminho) if caminho else 'ausente'}".encode())
+    return h.hexdigest()
+
+
+def compilar(tex_path: str) -> dict:
+    """
+    Compila um .tex em PDF no mesmo diretório. Retorna {"tex", "status", "passadas"}, com status
+    "compilado", "inalterado" (hash do .tex e das figuras igual ao do último PDF), "erro" ou
+    "indisponivel" (pdflatex não instalado).
+    """
+    diretorio = os.path.dirname(os.path.abspath(tex_path))
+    base = os.path.splitext(os.path.basename(tex_path))[0]
+    pdf_path = os.path.join(diretorio, base + ".pdf")
+    aux_path = os.path.join(diretorio, base + ".aux")
+    hash_path = os.path.join(diretorio, base + ".tex.sha256")
+
+    hash_tex = _hash_entradas(tex_path)
+    if os.path.exists(pdf_path) and os.path.exists(hash_path):
+        with open(hash_path, 'r') as f:
+            if f.read().strip() == hash_tex:
+                return {"tex": tex_path, "status": "inalterado", "passadas": 0}
+
+    # Diretório temporário no mesmo sistema de arquivos, para publicar o PDF com os.replace
+    temporario = tempfile.mkdtemp(prefix=".latex-", dir=diretorio)
+    try:
+        aux_temporario = os.path.join(temporario, base + ".aux")
+        if os.path.exists(aux_path):
+            shutil.copyfile(aux_path, aux_temporario)
+        passadas = 0
+        hash_aux = _hash_arquivo(aux_temporario)
+        while passadas < MAX_PASSADAS:
+            subprocess.run(
+                ["pdflatex", "-interaction=nonstopmode", "-output-directory", temporario, base + ".tex"],
+                cwd=diretorio,
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+            passadas += 1
+            # Referências cruzadas estáveis: o .aux não mudou nesta passada
+            hash_anterior, hash_aux = hash_aux, _hash_arquivo(aux_temporario)
+            if hash_aux == hash_anterior:
+                break
+        os.replace(os.path.join(temporario, base + ".pdf"), pdf_path)
+        if os.path.exists(aux_temporario):
+            os.replace(aux_temporario, aux_path)
+        with escrita_atomica(hash_path) as f:
+            f.write(hash_tex)
+        return {"tex": tex_path, "status": "compilado", "passadas": passadas}
+    except FileNotFoundError:
+        return {"tex": tex_path, "status": "indisponivel", "passadas": 0}
+    except subprocess.CalledProcessError as e:
+        print(f"Erro ao compilar o PDF: {tex_path}")
+        # Tentativa de decodificar com latin1, fallback para utf-8 ignorando erros
+        try:
+            print(e.stdout.decode('latin1'))
+        except UnicodeDecodeError:
+            print(e.stdout.decode('utf-8', errors='ignore'))
+        return {"tex": tex_path, "status": "erro", "passadas": passadas}
+    finally:
+        shutil.rmtree(temporario, ignore_errors=True)
+
+
+def informar(resultado: dict):
+    pdf_path = os.path.splitext(resultado["tex"])[0] + ".pdf"
+    if resultado["status"] == "compilado":
+        print(f"PDF gerado com sucesso em: {pdf_path} ({resultado['passadas']} passada(s) do pdflatex)")
+    elif resultado["status"] == "inalterado":
+        print(f"Relatório inalterado, PDF mantido em: {pdf_path}")
+    elif resultado["status"] == "indisponivel":
+        print(f"pdflatex não encontrado; compile manualmente: {resultado['tex']}")
+
+
+class CompiladorLatex:
+
+    def __init__(self, processos: int = None):
+        # processos: limite de compilações simultâneas (por padrão o número de CPUs)
+        self.processos = processos or os.cpu_count() or 1
+        self.tarefas = []
+        self.resultados = []
+
+    def agendar(self, tex_path: str):
+        self.tarefas.append(tex_path)
+
+    @staticmethod
+    def _compilar_isolado(tex_path: str) -> dict:
+        # Um erro inesperado em um relatório não interrompe a compilação dos demais
+        try:
+            return compilar(tex_path)
+        except Exception as e:
+            print(f"Falha ao compilar {tex_path}: {type(e).__name__}: {e}")
+            return {"tex": tex_path, "status": "erro", "passadas": 0}
+
+    def run(self):
+        if not self.tarefas:
+            return []
+        tarefas, self.tarefas = self.tarefas, []
+        # O trabalho pesado é do subprocesso pdflatex: threads bastam para limitar a concorrência
+        with ThreadPoolExecutor(max_workers=min(self.processos, len(tarefas))) as executor:
+            resultados = list(executor.map(self._compilar_isolado, tarefas))
+        for resultado in resultados:
+            informar(resultado)
+        self.resultados.extend(resultados)
+        return resultados
@@ -0,0 +1,87 @@
+import math
+import time
+from statistics import NormalDist
+
+"""
+Classe que representa o estado ajustado de um modelo SES (Suavização Exponencial Simples).
+Guarda apenas o necessário para prever e atualizar sem reajustar: alpha, nível atual
+e a escala dos resíduos (acumulada de forma incremental).
+"""
+class EstadoSES:
+
+    def __init__(self, serie_id: str, alpha: float, nivel: float, sigma: float, n: int,
+                 nivel_inicial: float = None, ajustado_em: float = None):
+        self.serie_id = str(serie_id)
+        self.alpha = float(alpha)
+        self.nivel = float(nivel)
+        self.nivel_inicial = float(nivel if nivel_inicial is None else nivel_inicial)
+        self.n = int(n)
+        # Instante do ajuste (timestamp Unix)
+        self.ajustado_em = float(time.time() if ajustado_em is None else ajustado_em)
+        # Soma dos quadrados dos resíduos: permite atualizar sigma a cada nova observação
+        self.sse = float(sigma) ** 2 * max(self.n, 1)
+
+    @classmethod
+    def from_ajuste(cls, serie_id: str, ajuste: dict, linha: int = 0) -> "EstadoSES":
+        """
+        Constrói o estado a partir do ajuste SES de model.kernels.ses (linha da série na matriz).
+        Observações ausentes não entram na escala dos resíduos.
+        """
+        import numpy as np
+
+        resid = np.asarray(ajuste["residuos"][linha], dtype=float)
+        resid = resid[~np.isnan(resid)]
+        n = len(resid)
+        sigma = math.sqrt(float((resid ** 2).sum()) / max(n, 1))
+        return cls(serie_id, ajuste["alpha"][linha], ajuste["nivel"][linha], sigma, n, ajuste["nivel_inicial"][linha])
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "EstadoSES":
+        return cls(d["serie_id"], d["alpha"], d["nivel"], d["sigma"], d["n"], d.get("nivel_inicial"), d.get("ajustado_em"))
+
+    def to_dict(self) -> dict:
+        return {
+            "serie_id": self.serie_id,
+            "alpha": self.alpha,
+            "nivel_inicial": self.nivel_inicial,
+            "nivel": self.nivel,
+            "sigma": self.sigma,
+            "n": self.n,
+            "ajustado_em": self.ajustado_em
+        }
+
+    @property
+    def sigma(self) -> float:
+        return math.sqrt(self.sse / max(self.n, 1))
+
+    def atualizar(self, valores) -> "EstadoSES":
+        """
+        Avança o estado com novas observações: l_t = l_{t-1} + alpha * (y_t - l_{t-1}).
+        Observações ausentes (None/NaN) não alteram o nível.
+        """
+        for y in valores:
+            if y is None or y != y:
+                continue
+            erro = float(y) - self.nivel
+            self.nivel += self.alpha * erro
+            self.sse += erro * erro
+            self.n += 1
+        return self
+
+    def prever(self, h: int, nivel_confianca: float = 0.95) -> dict:
+        """
+        Previsão h passos à frente (constante) e intervalos de previsão do ETS(A,N,N):
+        Var(e_{t+k}) = sigma² * (1 + (k - 1) * alpha²).
+        """
+        z = NormalDist().inv_cdf(0.5 + nivel_confianca / 2)
+        sigma = self.sigma
+        a2 = self.alpha ** 2
+        amplitudes = [z * sigma * math.sqrt(1 + (k - 1) * a2) for k in range(1, h + 1)]
+        return {
+            "serie_id": self.serie_id,
+            "h": h,
+            "nivel_confianca": nivel_confianca,
+            "forecast": [self.nivel] * h,
+            "lower": [self.nivel - a for a in amplitudes],
+            "upper": [self.nivel + a for a in amplitudes]
+        }
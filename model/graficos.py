@@ -0,0 +1,138 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from abstract.analysis import Analysis
+from abstract.arquivos import escrita_atomica
+
+"""
+Etapa de renderização das figuras.
+As análises apenas agendam tarefas (tipo, dados pré-calculados, caminho); a renderização usa
+a API orientada a objetos do Matplotlib (Figure + FigureCanvasAgg), sem o estado global do
+pyplot, e pode ser feita em série ou em um pool de processos (muitas séries no modo frota).
+"""
+
+def _nova_figura(figsize: tuple):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _salvar(fig, path: str):
+    with escrita_atomica(path, 'wb') as f:
+        fig.savefig(f, format="png")
+
+
+def _correlograma(ax, valores: np.ndarray, confint: np.ndarray, titulo: str):
+    """
+    Correlograma no estilo do statsmodels: hastes, marcadores e faixa de confiança centrada em zero.
+    """
+    lags = np.arange(len(valores))
+    ax.vlines(lags, 0, valores)
+    ax.plot(lags, valores, "o", markersize=5)
+    ax.axhline(0, color="black", linewidth=0.8)
+    banda = confint - valores[:, None]
+    ax.fill_between(lags, banda[:, 0], banda[:, 1], alpha=0.25, linewidth=0)
+    ax.set_title(titulo)
+
+
+def renderizar_acf_pacf(dados: dict, path: str):
+    fig = _nova_figura((15, 4))
+    axes = fig.subplots(1, 2)
+    _correlograma(axes[0], dados["acf_values"], dados["acf_ci"], f"Função de Autocorrelação (ACF) - Freq: {dados['freq']}")
+    _correlograma(axes[1], dados["pacf_values"], dados["pacf_ci"], "Função de Autocorrelação Parcial (PACF)")
+    fig.tight_layout()
+    _salvar(fig, path)
+
+
+def renderizar_previsao(dados: dict, path: str):
+    fig = _nova_figura((12, 6))
+    ax = fig.subplots()
+    ax.plot(dados["train_index"], dados["train"], label='Treino')
+    ax.plot(dados["test_index"], dados["test"], label='Teste (Real)', color='green')
+    ax.plot(dados["forecast_index"], dados["forecast"], label='Previsão SES', color='red', linestyle='--')
+    ax.set_title(f'Previsão SES - Horizonte h={dados["h"]}')
+    ax.legend()
+    ax.grid(True)
+    _salvar(fig, path)
+
+
+def renderizar_residuos(dados: dict, path: str):
+    fig = _nova_figura((12, 6))
+    ax = fig.subplots()
+    ax.plot(dados["index"], dados["residuals"], label='Resíduos', color='blue', alpha=0.7)
+    ax.scatter(dados["outliers_index"], dados["outliers"], color='red', label='Outliers', zorder=5)
+    ax.axhline(y=dados["upper"], color='orange', linestyle='--', label='Limiar Superior (3σ)')
+    ax.axhline(y=dados["lower"], color='orange', linestyle='--', label='Limiar Inferior (3σ)')
+    ax.axhline(y=0, color='black', linewidth=0.5)
+    ax.set_title('Diagnóstico de Outliers - Resíduos do Modelo SES')
+    ax.legend()
+    ax.grid(True)
+    _salvar(fig, path)
+
+
+RENDERIZADORES = {
+    "acf_pacf": renderizar_acf_pacf,
+    "previsao": renderizar_previsao,
+    "residuos": renderizar_residuos,
+}
+
+
+def renderizar(tarefa: tuple) -> tuple:
+    """
+    Renderiza uma tarefa (tipo, dados, caminho). Função de módulo para poder ser
+    enviada a um pool de processos. Retorna (caminho, segundos).
+    """
+    tipo, dados, path = tarefa
+    inicio = time.perf_counter()
+    RENDERIZADORES[tipo](dados, path)
+    return path, time.perf_counter() - inicio
+
+
+def _renderizar_isolado(tarefa: tuple) -> tuple:
+    """
+    Como renderizar, mas uma figura com erro não interrompe as demais: retorna (caminho, segundos, erro).
+    """
+    try:
+        return (*renderizar(tarefa), None)
+    except Exception as e:
+        return tarefa[2], 0.0, f"{type(e).__name__}: {e}"
+
+
+class Graficos(Analysis):
+
+    def __init__(self, processos: int = None):
+        # processos: None ou 1 renderiza em série; > 1 usa um pool de processos
+        self.processos = processos
+        self.tarefas = []
+        self.tempo_renderizacao = 0.0
+        # Figuras da última execução que falharam (caminho -> mensagem de erro)
+        self.falhas = {}
+
+    def agendar(self, tipo: str, dados: dict, path: str):
+        self.tarefas.append((tipo, dados, path))
+
+    def run(self):
+        if not self.tarefas:
+            return
+        tarefas, self.tarefas = self.tarefas, []
+        self.falhas = {}
+        with self._etapa("render"):
+            inicio = time.perf_counter()
+            if self.processos and self.processos > 1 and len(tarefas) > 1:
+                chunksize = max(1, len(tarefas) // (4 * self.processos))
+                with ProcessPoolExecutor(max_workers=self.processos) as executor:
+                    resultados = list(executor.map(_renderizar_isolado, tarefas, chunksize=chunksize))
+            else:
+                resultados = [_renderizar_isolado(tarefa) for tarefa in tarefas]
+            self.tempo_renderizacao += time.perf_counter() - inicio
+            self.falhas = {path: erro for path, _, erro in resultados if erro is not None}
+            for path, _, erro in resultados:
+                if erro is None:
+                    self._registrar_arquivo(path)
+        print(f"{len(resultados) - len(self.falhas)} figuras renderizadas em {time.perf_counter() - inicio:.2f}s "
+              f"(CPU de renderização: {sum(t for _, t, _ in resultados):.2f}s)")
+        for path, _, erro in resultados:
+            print(f"Gráfico salvo em: {path}" if erro is None else f"Falha ao renderizar {path}: {erro}")
@@ -0,0 +1,197 @@
+import os
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+from abstract.analysis import Analysis
+from model import kernels
+
+"""
+Classe responsável pela previsão hierárquica com reconciliação.
+As séries folha (ex: regiões) são previstas com o mesmo SES da Questão 3, os agregados
+(ex: total nacional) são obtidos pela matriz de soma esparsa S e as previsões são
+reconciliadas (bottom-up, OLS, WLS e MinT-shrink) com operações matriciais.
+"""
+class Hierarquia(Analysis):
+
+    METODOS = ("bottom_up", "ols", "wls", "mint_shrink")
+
+    def __init__(self, painel: pd.DataFrame, estrutura: pd.DataFrame, h: int, output_dir: str,
+                 metodos: tuple = ("bottom_up", "ols", "wls")):
+        """
+        painel: DataFrame com uma coluna por série folha (índice temporal).
+        estrutura: DataFrame indexado pelo id da folha, com uma coluna por nível
+        intermediário, do mais agregado para o mais desagregado (ex: ["regiao"]).
+        O nível "Total" é sempre incluído no topo da hierarquia.
+        """
+        self.painel = painel
+        self.estrutura = estrutura.loc[painel.columns]
+        self.h = h
+        self.output_dir = output_dir
+        invalidos = set(metodos) - set(self.METODOS)
+        if invalidos:
+            raise ValueError(f"Métodos de reconciliação desconhecidos: {sorted(invalidos)}")
+        self.metodos = tuple(metodos)
+        self.file_path_forecasts = os.path.join(self.output_dir, "q3_hier_forecasts.csv")
+        self.file_path_metrics = os.path.join(self.output_dir, "q3_hier_metrics.csv")
+
+    def _build_summing_matrix(self):
+        """
+        Monta a matriz de soma S (n_nós x n_folhas) em formato esparso.
+        As linhas seguem a ordem: Total, níveis intermediários e folhas,
+        de modo que S = [A; I] e os agregados ocupam as primeiras linhas.
+        """
+        n_folhas = len(self.painel.columns)
+        colunas = np.arange(n_folhas)
+
+        nomes = ["Total"]
+        niveis = ["Total"]
+        linhas = [np.zeros(n_folhas, dtype=np.int64)]
+        offset = 1
+
+        # Cada nível intermediário é identificado pelo caminho completo até ele
+        chaves = pd.Series([""] * n_folhas, index=self.estrutura.index)
+        for nivel in self.estrutura.columns:
+            chaves = chaves + "/" + self.estrutura[nivel].astype(str)
+            codigos, unicos = pd.factorize(chaves.values)
+            linhas.append(codigos + offset)
+            nomes.extend(u.lstrip("/") for u in unicos)
+            niveis.extend([nivel] * len(unicos))
+            offset += len(unicos)
+
+        linhas.append(colunas + offset)
+        nomes.extend(str(c) for c in self.painel.columns)
+        niveis.extend(["folha"] * n_folhas)
+        n_nos = offset + n_folhas
+
+        rows = np.concatenate(linhas)
+        cols = np.tile(colunas, len(linhas))
+        S = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n_nos, n_folhas))
+        return S, nomes, niveis, n_nos - n_folhas
+
+    def _split_data(self, dados: np.ndarray):
+        """
+        Divide os dados (tempo x nós) em treino e teste, com teste de tamanho h.
+        """
+        return dados[:-self.h], dados[-self.h:]
+
+    def _fit_predict(self, train: np.ndarray):
+        """
+        Ajusta o SES (mesma configuração da Questão 3) em todos os nós de uma vez e faz a previsão.
+        Retorna as previsões base (h x nós) e os resíduos dentro da amostra (tempo x nós); resíduos
+        de observações ausentes entram como zero nas covariâncias da reconciliação.
+        """
+        model = kernels.ses(train.T)
+        forecasts = np.tile(model["nivel"], (self.h, 1))
+        residuals = np.nan_to_num(model["residuos"].T.astype(float))
+        return forecasts, residuals
+
+    def _shrink_covariance(self, residuals: np.ndarray) -> np.ndarray:
+        """
+        Estimador de covariância com encolhimento para a diagonal (Schäfer-Strimmer),
+        usado pelo MinT-shrink. Custo O(n²) em memória: indicado para hierarquias moderadas.
+        """
+        n_obs = residuals.shape[0]
+        cov = residuals.T @ residuals / n_obs
+        std = np.sqrt(np.diag(cov))
+        std[std == 0] = 1.0
+        xs = residuals / std
+        cor = cov / np.outer(std, std)
+        v = (xs ** 2).T @ (xs ** 2) - (xs.T @ xs) ** 2 / n_obs
+        v *= 1.0 / (n_obs * (n_obs - 1))
+        np.fill_diagonal(v, 0.0)
+        d = cor ** 2
+        np.fill_diagonal(d, 0.0)
+        lam = float(np.clip(v.sum() / d.sum(), 0.0, 1.0)) if d.sum() > 0 else 1.0
+        shrunk = (1.0 - lam) * cov
+        shrunk[np.diag_indices_from(shrunk)] = np.diag(cov)
+        return shrunk
+
+    def _reconcile(self, metodo: str, base: np.ndarray, residuals: np.ndarray, S, n_agregados: int) -> np.ndarray:
+        """
+        Reconcilia as previsões base (h x nós).
+        Para os métodos MinT usa-se a forma com restrições C = [I | -A]:
+            y_rec = y - W C' (C W C')^{-1} C y
+        que só exige resolver um sistema do tamanho do número de agregados.
+        """
+        if metodo == "bottom_up":
+            return (S @ base[:, n_agregados:].T).T
+
+        n_nos = S.shape[0]
+        A = S[:n_agregados]
+        C = sparse.hstack([sparse.identity(n_agregados, format="csr"), -A], format="csr")
+        erro_coerencia = C @ base.T  # (agregados x h)
+
+        if metodo == "mint_shrink":
+            W = self._shrink_covariance(residuals)
+            WCt = C @ W  # (agregados x nós), W é simétrica
+            CWCt = WCt @ C.T
+            ajuste = WCt.T @ np.linalg.solve(CWCt, erro_coerencia)
+            return base - ajuste.T
+
+        if metodo == "ols":
+            w = np.ones(n_nos)
+        else:  # wls: variância dos resíduos de cada nó
+            w = residuals.var(axis=0)
+            w[w <= 0] = np.finfo(float).eps
+        W = sparse.diags(w)
+        WCt = W @ C.T
+        CWCt = (C @ WCt).tocsc()
+        solucao = spsolve(CWCt, erro_coerencia)
+        solucao = np.asarray(solucao).reshape(n_agregados, -1)
+        return base - (WCt @ solucao).T
+
+    def _calculate_metrics(self, test: np.ndarray, forecasts: dict, niveis: list) -> pd.DataFrame:
+        """
+        Calcula RMSE, MAE e MAPE por nível da hierarquia e por método.
+        """
+        niveis = np.asarray(niveis)
+        eps = np.finfo(np.float64).eps
+        results = []
+        for metodo, forecast in forecasts.items():
+            for nivel in pd.unique(niveis):
+                mask = niveis == nivel
+                real = test[:, mask]
+                erro = real - forecast[:, mask]
+                results.append({
+                    "Level": nivel,
+                    "Method": metodo,
+                    "RMSE": np.sqrt(np.nanmean(erro ** 2)),
+                    "MAE": np.nanmean(np.abs(erro)),
+                    "MAPE": np.nanmean(np.abs(erro) / np.maximum(np.abs(real), eps)) * 100
+                })
+        return pd.DataFrame(results)
+
+    def run(self):
+        S, nomes, niveis, n_agregados = self._build_summing_matrix()
+
+        # Séries de todos os nós: (tempo x nós) = Y_folhas @ S'
+        dados = np.asarray((S @ self.painel.to_numpy(dtype=float).T).T)
+        train, test = self._split_data(dados)
+        with self._etapa("fit"):
+            base, residuals = self._fit_predict(train)
+
+        forecasts = {"base": base}
+        with self._etapa("reconcile"):
+            for metodo in self.metodos:
+                forecasts[metodo] = self._reconcile(metodo, base, residuals, S, n_agregados)
+
+        # Salvar previsões reconciliadas (formato longo)
+        datas = self.painel.index[-self.h:]
+        frames = []
+        for metodo, forecast in forecasts.items():
+            frames.append(pd.DataFrame({
+                "Node": np.repeat(nomes, self.h),
+                "Level": np.repeat(niveis, self.h),
+                "Method": metodo,
+                "Date": np.tile(datas, len(nomes)),
+                "Forecast": forecast.T.ravel(),
+                "Actual": test.T.ravel()
+            }))
+        self._save_frame(pd.concat(frames, ignore_index=True), self.file_path_forecasts, "q3_hier_forecasts")
+        print(f"Previsões hierárquicas salvas em: {self.file_path_forecasts}")
+
+        # Salvar métricas por nível
+        df_metrics = self._calculate_metrics(test, forecasts, niveis)
+        self._save_frame(df_metrics, self.file_path_metrics, "q3_hier_metrics")
+        print(f"Métricas hierárquicas salvas em: {self.file_path_metrics}")
@@ -0,0 +1,251 @@
+import numpy as np
+
+"""
+Kernels vetorizados sobre matrizes de séries (uma série por linha, eixo temporal nas colunas).
+Operam diretamente sobre o PainelCompacto (float32 ou float64), sem pd.Series por série:
+SES (ajuste de alpha e nível inicial, filtro de um passo), ACF via FFT com intervalos de
+Bartlett e Ljung-Box, PACF (Yule-Walker), o critério de outliers de 3 desvios padrão e o
+diagnóstico dos resíduos (Ljung-Box, Jarque-Bera e ACF residual).
+Valores ausentes (NaN) são tratados nativamente, preservando o eixo temporal: o SES não atualiza
+o nível em uma observação ausente e a ACF considera apenas os pares de instantes observados,
+de modo que a defasagem k continua correspondendo a k períodos.
+Os acumuladores usam float64 independentemente do dtype de entrada.
+"""
+
+def _como_matriz(y: np.ndarray) -> np.ndarray:
+    y = np.asarray(y)
+    return y[None, :] if y.ndim == 1 else y
+
+
+def _ses_sse(y: np.ndarray, alphas: np.ndarray):
+    """
+    SSE de um passo para cada série (linhas) e cada alpha da grade (colunas), com o nível
+    inicial ótimo em forma fechada: a previsão é linear em l0, yhat_t = a_t + (1 - alpha)^t * l0,
+    onde a_t é a previsão obtida com l0 = 0. Em observações ausentes nada é acumulado e o
+    nível (e portanto o peso de l0) permanece o mesmo.
+    """
+    n, T = y.shape
+    nivel = np.zeros((n, alphas.shape[1]))
+    peso = np.ones_like(nivel)
+    s_ee = np.zeros_like(nivel)
+    s_be = np.zeros_like(nivel)
+    s_bb = np.zeros_like(nivel)
+    for t in range(T):
+        yt = y[:, t, None].astype(np.float64)
+        presente = ~np.isnan(yt)
+        erro = np.where(presente, yt - nivel, 0.0)
+        s_ee += erro * erro
+        s_be += peso * erro
+        s_bb += np.where(presente, peso * peso, 0.0)
+        nivel += alphas * erro
+        peso *= np.where(presente, 1.0 - alphas, 1.0)
+    nivel_inicial = np.divide(s_be, s_bb, out=np.full_like(s_be, np.nan), where=s_bb > 0)
+    sse = s_ee - s_be * np.nan_to_num(nivel_inicial)
+    return sse, nivel_inicial
+
+
+def ses_ajustar(y: np.ndarray, n_grade: int = 21, refinamentos: int = 6) -> dict:
+    """
+    Estima alpha (em [0, 1]) e o nível inicial por série minimizando o SSE de um passo,
+    com uma grade de alphas refinada em torno do melhor valor a cada rodada.
+    """
+    y = _como_matriz(y)
+    n = y.shape[0]
+    linhas = np.arange(n)
+    inferior = np.zeros(n)
+    superior = np.ones(n)
+    for _ in range(refinamentos + 1):
+        alphas = inferior[:, None] + (superior - inferior)[:, None] * np.linspace(0.0, 1.0, n_grade)
+        sse, nivel_inicial = _ses_sse(y, alphas)
+        melhor = np.argmin(sse, axis=1)
+        passo = (superior - inferior) / (n_grade - 1)
+        alpha = alphas[linhas, melhor]
+        inferior = np.clip(alpha - passo, 0.0, 1.0)
+        superior = np.clip(alpha + passo, 0.0, 1.0)
+    return {"alpha": alpha, "nivel_inicial": nivel_inicial[linhas, melhor], "sse": sse[linhas, melhor]}
+
+
+def ses_filtrar(y: np.ndarray, alpha: np.ndarray, nivel_inicial: np.ndarray):
+    """
+    Previsões de um passo (valores ajustados) e nível final de cada série.
+    Os resíduos do SES são y - previsões (NaN nas observações ausentes).
+    """
+    y = _como_matriz(y)
+    nivel = np.array(nivel_inicial, dtype=np.float64, copy=True)
+    alpha = np.asarray(alpha, dtype=np.float64)
+    # Entradas inteiras produzem previsões em ponto flutuante (float32 é preservado)
+    previsoes = np.empty(y.shape, dtype=np.result_type(y.dtype, np.float32))
+    for t in range(y.shape[1]):
+        previsoes[:, t] = nivel
+        erro = y[:, t] - nivel
+        nivel += alpha * np.where(np.isnan(erro), 0.0, erro)
+    return previsoes, nivel
+
+
+def ses(y: np.ndarray) -> dict:
+    """
+    Ajusta o SES de cada série e devolve parâmetros, nível final, valores ajustados e resíduos.
+    """
+    y = _como_matriz(y)
+    ajuste = ses_ajustar(y)
+    previsoes, nivel = ses_filtrar(y, ajuste["alpha"], ajuste["nivel_inicial"])
+    ajuste.update({"nivel": nivel, "previsoes": previsoes, "residuos": y - previsoes})
+    return ajuste
+
+
+def metricas(real: np.ndarray, previsto: np.ndarray) -> dict:
+    """
+    RMSE, MAE e MAPE (%) por série, considerando apenas as observações presentes.
+    """
+    real = _como_matriz(real).astype(np.float64)
+    erro = real - _como_matriz(previsto)
+    eps = np.finfo(np.float64).eps
+    return {
+        "RMSE": np.sqrt(np.nanmean(erro ** 2, axis=1)),
+        "MAE": np.nanmean(np.abs(erro), axis=1),
+        "MAPE": np.nanmean(np.abs(erro) / np.maximum(np.abs(real), eps), axis=1) * 100
+    }
+
+
+def _correlacao_circular(x: np.ndarray, nlags: int) -> np.ndarray:
+    T = x.shape[1]
+    tamanho = 1 << int(np.ceil(np.log2(2 * T - 1)))
+    espectro = np.fft.rfft(x, n=tamanho, axis=1)
+    return np.fft.irfft(espectro * np.conj(espectro), n=tamanho, axis=1)[:, :nlags + 1]
+
+
+def autocovariancia(y: np.ndarray, nlags: int, ajustada: bool = False) -> np.ndarray:
+    """
+    Autocovariâncias das defasagens 0..nlags via FFT, em torno da média das observações presentes.
+    Viesadas (divididas pelo número de observações) ou ajustadas (divididas pelo número de pares
+    observados em cada defasagem, T - k quando não há ausentes).
+    """
+    y = _como_matriz(y).astype(np.float64)
+    presente = ~np.isnan(y)
+    n_obs = presente.sum(axis=1, keepdims=True)
+    media = np.nansum(y, axis=1, keepdims=True) / np.maximum(n_obs, 1)
+    soma = _correlacao_circular(np.where(presente, y - media, 0.0), nlags)
+    if ajustada:
+        pares = np.rint(_correlacao_circular(presente.astype(np.float64), nlags))
+        return soma / np.maximum(pares, 1)
+    return soma / np.maximum(n_obs, 1)
+
+
+def _n_obs(y: np.ndarray) -> np.ndarray:
+    return (~np.isnan(y)).sum(axis=1, keepdims=True).astype(np.float64)
+
+
+def acf(y: np.ndarray, nlags: int, alpha: float = 0.05, qstat: bool = False) -> dict:
+    """
+    ACF por série com intervalos de confiança de Bartlett (como statsmodels.tsa.stattools.acf)
+    e, opcionalmente, as estatísticas de Ljung-Box de cada defasagem.
+    """
+    from statistics import NormalDist
+
+    y = _como_matriz(y)
+    T = _n_obs(y)
+    gamma = autocovariancia(y, nlags)
+    valores = gamma / gamma[:, :1]
+    # Variância de Bartlett: 1/T na defasagem 1, acumulando as autocorrelações anteriores
+    variancia = np.ones_like(valores) / T
+    variancia[:, 0] = 0.0
+    variancia[:, 2:] *= 1 + 2 * np.cumsum(valores[:, 1:-1] ** 2, axis=1)
+    intervalo = NormalDist().inv_cdf(1 - alpha / 2) * np.sqrt(variancia)
+    resultado = {"acf": valores, "confint": np.stack([valores - intervalo, valores + intervalo], axis=-1)}
+    if qstat:
+        from scipy.stats import chi2
+
+        lags = np.arange(1, nlags + 1)
+        q = T * (T + 2) * np.cumsum(valores[:, 1:] ** 2 / (T - lags), axis=1)
+        resultado["qstat"] = q
+        resultado["pvalues"] = chi2.sf(q, lags)
+    return resultado
+
+
+def pacf(y: np.ndarray, nlags: int, alpha: float = 0.05) -> dict:
+    """
+    PACF por Yule-Walker (autocovariâncias ajustadas, como method='yw' do statsmodels),
+    resolvida pela recursão de Durbin-Levinson para todas as séries ao mesmo tempo,
+    com intervalos de confiança +- z / sqrt(T).
+    """
+    from statistics import NormalDist
+
+    y = _como_matriz(y)
+    gamma = autocovariancia(y, nlags, ajustada=True)
+    r = gamma / gamma[:, :1]
+    n = r.shape[0]
+    valores = np.ones((n, nlags + 1))
+    phi = np.zeros((n, nlags + 1))
+    for k in range(1, nlags + 1):
+        anteriores = phi[:, 1:k]
+        numerador = r[:, k] - (anteriores * r[:, k - 1:0:-1]).sum(axis=1)
+        denominador = 1.0 - (anteriores * r[:, 1:k]).sum(axis=1)
+        phi_kk = numerador / denominador
+        phi[:, 1:k] = anteriores - phi_kk[:, None] * anteriores[:, ::-1]
+        phi[:, k] = phi_kk
+        valores[:, k] = phi_kk
+    intervalo = NormalDist().inv_cdf(1 - alpha / 2) / np.sqrt(_n_obs(y))
+    confint = np.stack([valores - intervalo, valores + intervalo], axis=-1)
+    confint[:, 0] = 1.0
+    return {"pacf": valores, "confint": confint}
+
+
+def outliers_3sigma(residuos: np.ndarray, k: float = 3.0) -> dict:
+    """
+    Marca como outliers os resíduos a mais de k desvios padrão (amostral) da média de cada série.
+    """
+    residuos = _como_matriz(residuos)
+    media = np.nanmean(residuos, axis=1, dtype=np.float64)
+    desvio = np.nanstd(residuos, axis=1, ddof=1, dtype=np.float64)
+    superior = media + k * desvio
+    inferior = media - k * desvio
+    mascara = (residuos > superior[:, None]) | (residuos < inferior[:, None])
+    return {"mascara": mascara, "media": media, "desvio": desvio, "superior": superior, "inferior": inferior}
+
+
+def jarque_bera(y: np.ndarray) -> dict:
+    """
+    Teste de normalidade de Jarque-Bera por série, com assimetria e curtose (momentos viesados,
+    como statsmodels.stats.stattools.jarque_bera), considerando apenas as observações presentes.
+    """
+    from scipy.stats import chi2
+
+    y = _como_matriz(y).astype(np.float64)
+    n = _n_obs(y)[:, 0]
+    desvios = y - np.nanmean(y, axis=1, keepdims=True)
+    m2 = np.nanmean(desvios ** 2, axis=1)
+    assimetria = np.nanmean(desvios ** 3, axis=1) / m2 ** 1.5
+    curtose = np.nanmean(desvios ** 4, axis=1) / m2 ** 2
+    estatistica = n / 6 * (assimetria ** 2 + (curtose - 3) ** 2 / 4)
+    return {"estatistica": estatistica, "pvalor": chi2.sf(estatistica, 2),
+            "assimetria": assimetria, "curtose": curtose}
+
+
+def diagnostico_residuos(residuos: np.ndarray, nlags: int = 10, graus_modelo: int = 0, alpha: float = 0.05) -> dict:
+    """
+    Diagnóstico dos resíduos de todas as séries em uma passada: ACF residual com intervalos e
+    Ljung-Box de cada defasagem (uma única autocovariância via FFT) e Jarque-Bera.
+    Os p-valores de Ljung-Box usam nlags - graus_modelo graus de liberdade (parâmetros estimados,
+    como model_df de statsmodels.stats.diagnostic.acorr_ljungbox); NaN onde não há graus de liberdade.
+    """
+    from scipy.stats import chi2
+
+    residuos = _como_matriz(residuos)
+    correlacoes = acf(residuos, nlags, alpha=alpha, qstat=True)
+    graus = np.arange(1, nlags + 1) - graus_modelo
+    pvalores = np.where(graus > 0, chi2.sf(correlacoes["qstat"], np.maximum(graus, 1)), np.nan)
+    normalidade = jarque_bera(residuos)
+    fora = (correlacoes["confint"][:, 1:, 0] > 0) | (correlacoes["confint"][:, 1:, 1] < 0)
+    return {
+        "acf": correlacoes["acf"],
+        "confint": correlacoes["confint"],
+        "qstat": correlacoes["qstat"],
+        "pvalues": pvalores,
+        "ljung_box": correlacoes["qstat"][:, -1],
+        "ljung_box_pvalor": pvalores[:, -1],
+        "defasagens_fora": fora.sum(axis=1),
+        "jarque_bera": normalidade["estatistica"],
+        "jarque_bera_pvalor": normalidade["pvalor"],
+        "assimetria": normalidade["assimetria"],
+        "curtose": normalidade["curtose"]
+    }
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+"""
+Representação compacta de muitas séries para o modo frota.
+As séries ficam em uma única matriz contígua (n_series x comprimento, float32 ou float64) com
+um eixo temporal regular compartilhado descrito apenas por início + frequência, em vez de um
+DatetimeIndex por série. Os kernels de model.kernels operam diretamente sobre a matriz; a
+Frota aceita o painel no lugar do dicionário de séries e materializa pd.Series apenas para o
+lote em execução. Posições sem observação ficam como NaN.
+"""
+
+class PainelCompacto:
+
+    def __init__(self, valores: np.ndarray, inicio, freq: str, ids: list, dtype=np.float32):
+        self.valores = np.ascontiguousarray(valores, dtype=dtype)
+        if self.valores.ndim != 2 or self.valores.shape[0] != len(ids):
+            raise ValueError("valores deve ter uma linha por id de série")
+        self.inicio = pd.Timestamp(inicio)
+        self.freq = freq
+        self.ids = [str(i) for i in ids]
+        self._posicoes = {series_id: i for i, series_id in enumerate(self.ids)}
+        self._eixo = None
+
+    @classmethod
+    def from_series(cls, series: dict, freq: str = None, dtype=np.float32) -> "PainelCompacto":
+        """
+        Monta o painel a partir de um dicionário id -> pd.Series, alinhando todas as séries
+        no eixo regular que cobre do menor ao maior instante observado.
+        """
+        primeira = next(iter(series.values()))
+        freq = freq or primeira.index.freqstr or pd.infer_freq(primeira.index)
+        inicio = min(s.index[0] for s in series.values())
+        fim = max(s.index[-1] for s in series.values())
+        eixo = pd.date_range(inicio, fim, freq=freq)
+        valores = np.full((len(series), len(eixo)), np.nan, dtype=dtype)
+        for i, serie in enumerate(series.values()):
+            if len(serie) == len(eixo) and serie.index[0] == inicio:
+                valores[i] = serie.to_numpy()
+            else:
+                valores[i, eixo.get_indexer(serie.index)] = serie.to_numpy()
+        return cls(valores, inicio, freq, list(series), dtype)
+
+    @property
+    def comprimento(self) -> int:
+        return self.valores.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return self.valores.nbytes
+
+    def eixo(self) -> pd.DatetimeIndex:
+        """
+        Eixo temporal gerado a partir de início + frequência (criado uma vez e compartilhado
+        pelas séries materializadas).
+        """
+        if self._eixo is None:
+            self._eixo = pd.date_range(self.inicio, periods=self.comprimento, freq=self.freq)
+        return self._eixo
+
+    def posicao(self, series_id: str) -> int:
+        return self._posicoes[str(series_id)]
+
+    def linhas(self, ids: list) -> np.ndarray:
+        return self.valores[[self.posicao(series_id) for series_id in ids]]
+
+    def serie(self, series_id: str) -> pd.Series:
+        """
+        Materializa uma série como pd.Series (para as etapas que usam pandas/statsmodels).
+        """
+        return pd.Series(self.valores[self.posicao(series_id)], index=self.eixo(), name=str(series_id))
+
+    # Interface de dicionário id -> pd.Series, aceita pela Frota no lugar de dict
+    def __getitem__(self, series_id: str) -> pd.Series:
+        return self.serie(series_id)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, series_id) -> bool:
+        return str(series_id) in self._posicoes
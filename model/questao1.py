@@ -1,11 +1,9 @@
 import os
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from statsmodels.tsa.stattools import acf, pacf
-from statsmodels.graphics.tsaplots import plot_acf, plot_pacf
 
 from abstract.analysis import Analysis
+from model import kernels
 
 """
 Classe responsável por responder aos objetivos da Questão 1.
@@ -13,7 +11,8 @@ Classe responsável por responder aos objetivos da Questão 1.
 class Questao1(Analysis):
 
     def __init__(self, serie: pd.Series, freq: int, output_dir: str):
-        self.serie = serie.dropna()
+        # Ausentes (NaN) são mantidos: os kernels preservam o eixo temporal e as defasagens sazonais
+        self.serie = serie
         self.freq = freq
         self.output_dir = output_dir
         self.alpha = 0.05  # Define o nível de significância (95% CI)
@@ -26,36 +25,33 @@ class Questao1(Analysis):
 
     # calcula a autocorrelação (ACF e PACF)
     def _calculate_autocorrelation(self) -> dict:
-        # calcula ACF (Autocorrelação) e os CIs
-        # Retorna: acf, confint, qstat, pvalues
-        acf_values, acf_ci, qstat, pvalues = acf(self.serie, nlags=self.lags, alpha=self.alpha, fft=True, qstat=True)
+        y = self.serie.to_numpy(dtype=float)
 
-        # calcula PACF (Autocorrelação Parcial) e os CIs
-        pacf_values, pacf_ci = pacf(self.serie, nlags=self.lags, method='yw', alpha=self.alpha)
+        # calcula ACF (Autocorrelação), os CIs e as estatísticas de Ljung-Box (via FFT)
+        res_acf = kernels.acf(y, self.lags, alpha=self.alpha, qstat=True)
+
+        # calcula PACF (Autocorrelação Parcial, Yule-Walker) e os CIs
+        res_pacf = kernels.pacf(y, self.lags, alpha=self.alpha)
 
         return {
-            "acf_values": acf_values,
-            "pacf_values": pacf_values,
-            "acf_ci": acf_ci,
-            "pacf_ci": pacf_ci,
-            "qstat": qstat,
-            "pvalues": pvalues
+            "acf_values": res_acf["acf"][0],
+            "pacf_values": res_pacf["pacf"][0],
+            "acf_ci": res_acf["confint"][0],
+            "pacf_ci": res_pacf["confint"][0],
+            "qstat": res_acf["qstat"][0],
+            "pvalues": res_acf["pvalues"][0]
         }
 
-    # gera os correlogramas da autocorrelação (ACF e PACF)
-    def _plot_acf_pacf(self):
-        fig, axes = plt.subplots(1, 2, figsize=(15, 4))
-
-        # plota ACF
-        plot_acf(self.serie, lags=self.lags, ax=axes[0], title=f'Função de Autocorrelação (ACF) - Freq: {self.freq}')
-
-        # plota PACF
-        plot_pacf(self.serie, lags=self.lags, ax=axes[1], title='Função de Autocorrelação Parcial (PACF)')
-
-        plt.tight_layout()
-        plt.savefig(self.file_path_acf_pacf)
-        plt.close(fig)
-        print(f"Gráfico ACF/PACF salvo em: {self.file_path_acf_pacf}")
+    # agenda os correlogramas (ACF e PACF) com os valores já calculados
+    def _plot_acf_pacf(self, results: dict):
+        dados = {
+            "freq": self.freq,
+            "acf_values": results["acf_values"],
+            "acf_ci": results["acf_ci"],
+            "pacf_values": results["pacf_values"],
+            "pacf_ci": results["pacf_ci"],
+        }
+        self._agendar_grafico("acf_pacf", dados, self.file_path_acf_pacf)
 
     def _save_stats(self, results: dict):
         # Create a DataFrame to save the statistics
@@ -78,7 +74,7 @@ class Questao1(Analysis):
         })
         
         df.set_index("Lag", inplace=True)
-        df.to_csv(self.file_path_stats)
+        self._save_frame(df, self.file_path_stats, "q1_stats", index=True)
         print(f"Estatísticas da Questão 1 salvas em: {self.file_path_stats}")
 
     def _interpret_results(self, results: dict) -> str:
@@ -133,14 +129,14 @@ class Questao1(Analysis):
 
     # executa a questão 1
     def run(self):
-        results = self._calculate_autocorrelation()
-        self._plot_acf_pacf()
+        with self._etapa("fit"):
+            results = self._calculate_autocorrelation()
+        self._plot_acf_pacf(results)
         self._save_stats(results)
         
         interpretation = self._interpret_results(results)
         file_path_interpretation = os.path.join(self.output_dir, "q1_interpretation.txt")
-        with open(file_path_interpretation, 'w') as f:
-            f.write(interpretation)
+        self._save_text(interpretation, file_path_interpretation, "q1")
         print(f"Interpretação da Questão 1 salva em: {file_path_interpretation}")
         
 
@@ -1,8 +1,6 @@
 import os
 import pandas as pd
 import warnings
-from statsmodels.tsa.stattools import adfuller, kpss
-from statsmodels.tools.sm_exceptions import InterpolationWarning
 from abstract.analysis import Analysis
 
 """
@@ -11,6 +9,7 @@ Classe responsável por responder aos objetivos da Questão 2.
 class Questao2(Analysis):
 
     def __init__(self, serie: pd.Series, output_dir: str):
+        # ADF e KPSS não aceitam valores ausentes: única questão que os descarta
         self.serie = serie.dropna()
         self.output_dir = output_dir
         self.file_path_results = os.path.join(self.output_dir, "q2_stationarity_results.csv")
@@ -22,6 +21,8 @@ class Questao2(Analysis):
         H0: A série possui uma raiz unitária (não é estacionária).
         H1: A série não possui raiz unitária (é estacionária).
         """
+        from statsmodels.tsa.stattools import adfuller
+
         result = adfuller(self.serie, autolag='AIC')
         return {
             'Test Statistic': result[0],
@@ -38,6 +39,9 @@ class Questao2(Analysis):
         H0: A série é estacionária em torno de uma média determinística (ou tendência).
         H1: A série possui uma raiz unitária (não é estacionária).
         """
+        from statsmodels.tsa.stattools import kpss
+        from statsmodels.tools.sm_exceptions import InterpolationWarning
+
         # 'c' : stationarity around level (default)
         # 'ct': stationarity around trend
         # Vamos testar ambos ou assumir 'c' inicialmente? 
@@ -57,8 +61,9 @@ class Questao2(Analysis):
         }
 
     def run(self):
-        adf_results = self._perform_adf_test()
-        kpss_results = self._perform_kpss_test()
+        with self._etapa("fit"):
+            adf_results = self._perform_adf_test()
+            kpss_results = self._perform_kpss_test()
         
         # Salvar resultados numéricos
         results_list = []
@@ -80,7 +85,7 @@ class Questao2(Analysis):
                 results_list.append({'Test': 'KPSS', 'Metric': k, 'Value': v})
 
         df_results = pd.DataFrame(results_list)
-        df_results.to_csv(self.file_path_results, index=False)
+        self._save_frame(df_results, self.file_path_results, "q2_stationarity_results")
         print(f"Resultados numéricos salvos em: {self.file_path_results}")
 
 
@@ -1,10 +1,11 @@
 import os
+import json
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from statsmodels.tsa.holtwinters import SimpleExpSmoothing
-from sklearn.metrics import mean_squared_error, mean_absolute_error, mean_absolute_percentage_error
 from abstract.analysis import Analysis
+from abstract.arquivos import escrita_atomica
+from model import kernels
+from model.estado_ses import EstadoSES
 
 """
 Classe responsável por responder aos objetivos da Questão 3.
@@ -12,12 +13,15 @@ Classe responsável por responder aos objetivos da Questão 3.
 class Questao3(Analysis):
 
     def __init__(self, serie: pd.Series, h: int, output_dir: str):
-        self.serie = serie.dropna()
+        self.serie = serie
         self.h = h
         self.output_dir = output_dir
         self.file_path_metrics = os.path.join(self.output_dir, "q3_metrics.csv")
         self.file_path_plot = os.path.join(self.output_dir, "q3_forecast_plot.png")
         self.file_path_interpretation = os.path.join(self.output_dir, "q3_interpretation.txt")
+        self.file_path_state = os.path.join(self.output_dir, "q3_ses_state.json")
+        self.serie_id = str(serie.name) if serie.name is not None else "serie"
+        self.estado = None
 
     def _split_data(self):
         """
@@ -28,55 +32,67 @@ class Questao3(Analysis):
         test = self.serie.iloc[-self.h:]
         return train, test
 
-    def _fit_predict(self, train: pd.Series):
+    def _fit_predict(self, train: pd.Series, test: pd.Series):
         """
         Ajusta o modelo SES nos dados de treino e faz a previsão.
         """
-        # Ajusta o modelo SES. 
-        # initialization_method='estimated' estima o valor inicial.
-        model = SimpleExpSmoothing(train, initialization_method="estimated").fit()
-        
-        # Previsão h passos à frente
-        forecast = model.forecast(self.h)
-        
+        # Ajusta o modelo SES, estimando alpha e o nível inicial.
+        # Observações ausentes não atualizam o nível (model.kernels).
+        model = kernels.ses(train.to_numpy(dtype=float))
+
+        # Previsão h passos à frente (constante, igual ao último nível), no eixo do teste
+        forecast = pd.Series(np.repeat(model["nivel"][0], self.h), index=test.index)
+
         return model, forecast
 
     def _calculate_metrics(self, test: pd.Series, forecast: pd.Series, model) -> dict:
         """
         Calcula métricas de acurácia: RMSE, MAE, MAPE e extrai Alpha.
+        Observações de teste ausentes são desconsideradas.
         """
-        rmse = np.sqrt(mean_squared_error(test, forecast))
-        mae = mean_absolute_error(test, forecast)
-        mape = mean_absolute_percentage_error(test, forecast) * 100 # Em porcentagem
-        alpha = model.params['smoothing_level']
-        
+        metricas = kernels.metricas(test.to_numpy(dtype=float), forecast.to_numpy())
+
         return {
-            "RMSE": rmse,
-            "MAE": mae,
-            "MAPE": mape,
-            "Alpha": alpha
+            "RMSE": metricas["RMSE"][0],
+            "MAE": metricas["MAE"][0],
+            "MAPE": metricas["MAPE"][0],  # Em porcentagem
+            "Alpha": model["alpha"][0]
         }
 
+    def _save_state(self, model, test: pd.Series):
+        """
+        Persiste o estado SES (alpha, nível, escala dos resíduos) para uso pelo serviço de previsão.
+        O estado ajustado no treino é avançado com as observações de teste, sem reajuste,
+        para que o nível reflita a última observação disponível.
+        """
+        self.estado = EstadoSES.from_ajuste(self.serie_id, model).atualizar(test.tolist())
+        self.salvar_estado()
+
+    def salvar_estado(self):
+        """
+        Grava o estado SES corrente (também chamado pelo modo vigia após avançá-lo com novas observações).
+        """
+        with escrita_atomica(self.file_path_state) as f:
+            json.dump({self.estado.serie_id: self.estado.to_dict()}, f, indent=2)
+        print(f"Estado SES salvo em: {self.file_path_state}")
+
     def _plot_results(self, train: pd.Series, test: pd.Series, forecast: pd.Series):
         """
-        Gera gráfico comparando Treino, Teste e Previsão.
+        Agenda o gráfico comparando Treino, Teste e Previsão.
         """
-        plt.figure(figsize=(12, 6))
-        plt.plot(train.index, train, label='Treino')
-        plt.plot(test.index, test, label='Teste (Real)', color='green')
-        plt.plot(forecast.index, forecast, label='Previsão SES', color='red', linestyle='--')
-        plt.title(f'Previsão SES - Horizonte h={self.h}')
-        plt.legend()
-        plt.grid(True)
-        plt.savefig(self.file_path_plot)
-        plt.close()
-        print(f"Gráfico de previsão salvo em: {self.file_path_plot}")
+        dados = {
+            "h": self.h,
+            "train_index": train.index.values, "train": train.values,
+            "test_index": test.index.values, "test": test.values,
+            "forecast_index": forecast.index.values, "forecast": np.asarray(forecast),
+        }
+        self._agendar_grafico("previsao", dados, self.file_path_plot)
 
     def _interpret_results(self, model, metrics: dict) -> str:
         """
         Interpreta o valor de alpha e a acurácia.
         """
-        alpha = model.params['smoothing_level']
+        alpha = model["alpha"][0]
         rmse = metrics['RMSE']
         mape = metrics['MAPE']
         
@@ -135,18 +151,22 @@ class Questao3(Analysis):
 
     def run(self):
         train, test = self._split_data()
-        model, forecast = self._fit_predict(train)
-        metrics = self._calculate_metrics(test, forecast, model)
-        
+        with self._etapa("fit"):
+            model, forecast = self._fit_predict(train, test)
+            metrics = self._calculate_metrics(test, forecast, model)
+
         self._plot_results(train, test, forecast)
         
         # Salvar métricas
         df_metrics = pd.DataFrame([metrics])
-        df_metrics.to_csv(self.file_path_metrics, index=False)
+        self._save_frame(df_metrics, self.file_path_metrics, "q3_metrics")
         print(f"Métricas salvas em: {self.file_path_metrics}")
+
+        with self._etapa("persist"):
+            self._save_state(model, test)
+            self._registrar_arquivo(self.file_path_state)
         
         # Salvar interpretação
         interpretation = self._interpret_results(model, metrics)
-        with open(self.file_path_interpretation, 'w') as f:
-            f.write(interpretation)
+        self._save_text(interpretation, self.file_path_interpretation, "q3")
         print(f"Interpretação salva em: {self.file_path_interpretation}")
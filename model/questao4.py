@@ -1,9 +1,9 @@
 import os
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from statsmodels.tsa.holtwinters import SimpleExpSmoothing
 from abstract.analysis import Analysis
+from model import kernels
+from model.estado_ses import EstadoSES
 
 """
 Classe responsável por responder aos objetivos da Questão 4.
@@ -11,19 +11,28 @@ Classe responsável por responder aos objetivos da Questão 4.
 class Questao4(Analysis):
 
     def __init__(self, serie: pd.Series, output_dir: str):
-        self.serie = serie.dropna()
+        self.serie = serie
         self.output_dir = output_dir
         self.file_path_plot = os.path.join(self.output_dir, "q4_outliers_plot.png")
         self.file_path_interpretation = os.path.join(self.output_dir, "q4_interpretation.txt")
         self.file_path_outliers = os.path.join(self.output_dir, "q4_outliers.csv")
+        self.file_path_metrics = os.path.join(self.output_dir, "q4_metrics.csv")
+        self.file_path_diagnostics = os.path.join(self.output_dir, "q4_residual_diagnostics.csv")
+        self.file_path_residual_acf = os.path.join(self.output_dir, "q4_residual_acf.csv")
+        # Estado SES ajustado na série completa e resíduos (usados pelo modo vigia para continuar incrementalmente)
+        self.estado = None
+        self.residuos = None
+        # Resumo do diagnóstico dos resíduos (mesmas colunas de q4_residual_diagnostics.csv), usado pela Questão 5
+        self.diagnostico = None
 
     def _fit_model(self):
         """
-        Ajusta o modelo SES para obter os resíduos.
+        Ajusta o modelo SES e retorna os resíduos (NaN nas observações ausentes).
         Usamos o mesmo modelo da Questão 3 para consistência nas estimativas.
         """
-        model = SimpleExpSmoothing(self.serie, initialization_method="estimated").fit()
-        return model
+        model = kernels.ses(self.serie.to_numpy(dtype=float))
+        self.estado = EstadoSES.from_ajuste(str(self.serie.name) if self.serie.name is not None else "serie", model)
+        return pd.Series(model["residuos"][0], index=self.serie.index)
 
     def _detect_outliers(self, residuals: pd.Series):
         """
@@ -39,22 +48,43 @@ class Questao4(Analysis):
         
         return outliers, threshold_upper, threshold_lower, mean_resid, std_resid
 
+    def _diagnose_residuals(self, residuals: pd.Series):
+        """
+        Verifica se os resíduos do SES são ruído branco: Ljung-Box (até 10 defasagens, descontando
+        o alpha estimado), ACF residual e normalidade (Jarque-Bera), em uma passada de model.kernels.
+        """
+        nlags = max(2, min(10, residuals.count() // 5))
+        diagnostico = kernels.diagnostico_residuos(residuals.to_numpy(dtype=float), nlags, graus_modelo=1)
+        resumo = {
+            "Lags": nlags,
+            "Ljung-Box Q-Stat": diagnostico["ljung_box"][0],
+            "Ljung-Box p-value": diagnostico["ljung_box_pvalor"][0],
+            "ACF Lags Outside CI": int(diagnostico["defasagens_fora"][0]),
+            "Jarque-Bera": diagnostico["jarque_bera"][0],
+            "Jarque-Bera p-value": diagnostico["jarque_bera_pvalor"][0],
+            "Skewness": diagnostico["assimetria"][0],
+            "Kurtosis": diagnostico["curtose"][0]
+        }
+        acf_residual = pd.DataFrame({
+            "Lag": np.arange(1, nlags + 1),
+            "ACF": diagnostico["acf"][0, 1:],
+            "ACF_Lower_CI": diagnostico["confint"][0, 1:, 0],
+            "ACF_Upper_CI": diagnostico["confint"][0, 1:, 1],
+            "Ljung-Box Q-Stat": diagnostico["qstat"][0],
+            "Ljung-Box p-value": diagnostico["pvalues"][0]
+        })
+        return resumo, acf_residual
+
     def _plot_residuals(self, residuals: pd.Series, outliers: pd.Series, upper: float, lower: float):
         """
-        Plota os resíduos e destaca os outliers.
+        Agenda o gráfico dos resíduos com os outliers destacados.
         """
-        plt.figure(figsize=(12, 6))
-        plt.plot(residuals.index, residuals, label='Resíduos', color='blue', alpha=0.7)
-        plt.scatter(outliers.index, outliers, color='red', label='Outliers', zorder=5)
-        plt.axhline(y=upper, color='orange', linestyle='--', label='Limiar Superior (3σ)')
-        plt.axhline(y=lower, color='orange', linestyle='--', label='Limiar Inferior (3σ)')
-        plt.axhline(y=0, color='black', linewidth=0.5)
-        plt.title('Diagnóstico de Outliers - Resíduos do Modelo SES')
-        plt.legend()
-        plt.grid(True)
-        plt.savefig(self.file_path_plot)
-        plt.close()
-        print(f"Gráfico de outliers salvo em: {self.file_path_plot}")
+        dados = {
+            "index": residuals.index.values, "residuals": residuals.values,
+            "outliers_index": outliers.index.values, "outliers": outliers.values,
+            "upper": upper, "lower": lower,
+        }
+        self._agendar_grafico("residuos", dados, self.file_path_plot)
 
     def _interpret_results(self, outliers: pd.Series, std_resid: float) -> str:
         """
@@ -104,35 +134,39 @@ class Questao4(Analysis):
 
         return interpretation
 
-    def run(self):
-        model = self._fit_model()
-        residuals = model.resid
-        outliers, upper, lower, mean, std = self._detect_outliers(residuals)
-        
-        self._plot_residuals(residuals, outliers, upper, lower)
-        
-        # Salvar lista de outliers
+    def salvar_resultados(self, outliers: pd.Series, std: float):
+        """
+        Grava a lista de outliers, as métricas e a interpretação (também chamado pelo modo vigia).
+        """
         if not outliers.empty:
             df_outliers = outliers.reset_index()
             df_outliers.columns = ['Date', 'Residual']
-            df_outliers.to_csv(self.file_path_outliers, index=False)
+            self._save_frame(df_outliers, self.file_path_outliers, "q4_outliers")
             print(f"Lista de outliers salva em: {self.file_path_outliers}")
         else:
             print("Nenhum outlier encontrado para salvar em CSV.")
             # Criar arquivo vazio com cabeçalho para evitar erro no Relatorio
-            pd.DataFrame(columns=['Date', 'Residual']).to_csv(self.file_path_outliers, index=False)
+            self._save_frame(pd.DataFrame(columns=['Date', 'Residual']), self.file_path_outliers, "q4_outliers")
 
         # Salvar métricas (std_resid)
-        file_path_metrics = os.path.join(self.output_dir, "q4_metrics.csv")
-        pd.DataFrame([{"std_resid": std}]).to_csv(file_path_metrics, index=False)
-        print(f"Métricas de outliers salvas em: {file_path_metrics}")
+        self._save_frame(pd.DataFrame([{"std_resid": std}]), self.file_path_metrics, "q4_metrics")
+        print(f"Métricas de outliers salvas em: {self.file_path_metrics}")
 
         # Salvar interpretação
         interpretation = self._interpret_results(outliers, std)
-        with open(self.file_path_interpretation, 'w') as f:
-            f.write(interpretation)
+        self._save_text(interpretation, self.file_path_interpretation, "q4")
         print(f"Interpretação salva em: {self.file_path_interpretation}")
-        
 
+    def run(self):
+        with self._etapa("fit"):
+            self.residuos = self._fit_model()
+            outliers, upper, lower, mean, std = self._detect_outliers(self.residuos)
+            self.diagnostico, acf_residual = self._diagnose_residuals(self.residuos)
 
+        self._plot_residuals(self.residuos, outliers, upper, lower)
+        self.salvar_resultados(outliers, std)
 
+        # Salvar diagnóstico dos resíduos (resumo e ACF residual por defasagem)
+        self._save_frame(pd.DataFrame([self.diagnostico]), self.file_path_diagnostics, "q4_residual_diagnostics")
+        self._save_frame(acf_residual, self.file_path_residual_acf, "q4_residual_acf")
+        print(f"Diagnóstico dos resíduos salvo em: {self.file_path_diagnostics}")
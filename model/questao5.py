@@ -1,9 +1,8 @@
 import os
 import pandas as pd
 import numpy as np
-from statsmodels.tsa.holtwinters import SimpleExpSmoothing
-from sklearn.metrics import mean_squared_error, mean_absolute_percentage_error
 from abstract.analysis import Analysis
+from model import kernels
 
 """
 Classe responsável por responder aos objetivos da Questão 5.
@@ -11,31 +10,48 @@ Classe responsável por responder aos objetivos da Questão 5.
 class Questao5(Analysis):
 
     def __init__(self, serie: pd.Series, h: int, output_dir: str):
-        self.serie = serie.dropna()
+        self.serie = serie
         self.h = h
         self.output_dir = output_dir
         self.file_path_conclusion = os.path.join(self.output_dir, "q5_general_conclusion.txt")
+        # Diagnóstico dos resíduos da Questão 4 (repassado pelo Controller ou lido de q4_residual_diagnostics.csv)
+        self.diagnostico = None
+
+    def _load_diagnostics(self):
+        """
+        Obtém o resumo do diagnóstico dos resíduos da Questão 4, se disponível.
+        """
+        if self.diagnostico is not None:
+            return self.diagnostico
+        path = os.path.join(self.output_dir, "q4_residual_diagnostics.csv")
+        if os.path.exists(path):
+            df = pd.read_csv(path)
+            if not df.empty:
+                return df.iloc[0].to_dict()
+        return None
 
     def _fit_evaluate_model(self):
         """
         Re-ajusta o modelo SES e calcula métricas para embasar a conclusão.
         """
         # Divisão Treino/Teste
-        train = self.serie.iloc[:-self.h]
-        test = self.serie.iloc[-self.h:]
-        
-        # Ajuste
-        model = SimpleExpSmoothing(train, initialization_method="estimated").fit()
-        forecast = model.forecast(self.h)
-        
-        # Métricas
-        rmse = np.sqrt(mean_squared_error(test, forecast))
-        mape = mean_absolute_percentage_error(test, forecast) * 100
-        alpha = model.params['smoothing_level']
-        
+        y = self.serie.to_numpy(dtype=float)
+        train = y[:-self.h]
+        test = y[-self.h:]
+
+        # Ajuste (ausentes não atualizam o nível) e previsão constante
+        model = kernels.ses(train)
+        forecast = np.repeat(model["nivel"][0], self.h)
+
+        # Métricas (desconsiderando observações de teste ausentes)
+        metricas = kernels.metricas(test, forecast)
+        rmse = metricas["RMSE"][0]
+        mape = metricas["MAPE"][0]
+        alpha = model["alpha"][0]
+
         return alpha, rmse, mape
 
-    def _generate_conclusion(self, alpha: float, rmse: float, mape: float) -> str:
+    def _generate_conclusion(self, alpha: float, rmse: float, mape: float, diagnostico: dict = None) -> str:
         """
         Gera o texto da conclusão geral.
         """
@@ -70,24 +86,40 @@ class Questao5(Analysis):
         conclusion += "3. Confiabilidade e Robustez:\n"
         conclusion += "* A presença de outliers (diagnosticada na Q4) deve ser considerada. Se houver outliers recentes, a previsão do SES (que depende do nível final) pode ser enviesada.\n"
         conclusion += "* A simplicidade do SES é uma vantagem para robustez (menos parâmetros para estimar), mas uma desvantagem para capturar dinâmicas complexas.\n"
+        # Resíduos autocorrelacionados indicam estrutura (ex: sazonalidade) não capturada pelo SES
+        autocorrelacionados = False
+        if diagnostico is not None:
+            autocorrelacionados = diagnostico["Ljung-Box p-value"] < 0.05
+            conclusion += f"* Teste de Ljung-Box nos resíduos ({int(diagnostico['Lags'])} defasagens): p-valor = {diagnostico['Ljung-Box p-value']:.4f}.\n"
+            if autocorrelacionados:
+                conclusion += "* Os resíduos NÃO se comportam como ruído branco: há autocorrelação remanescente que o SES não capturou.\n"
+            else:
+                conclusion += "* Os resíduos são compatíveis com ruído branco: o SES extraiu a estrutura de dependência linear de curto prazo.\n"
+            conclusion += f"* Teste de Jarque-Bera: p-valor = {diagnostico['Jarque-Bera p-value']:.4f} (assimetria {diagnostico['Skewness']:.2f}, curtose {diagnostico['Kurtosis']:.2f}).\n"
+            if diagnostico["Jarque-Bera p-value"] < 0.05:
+                conclusion += "* A normalidade dos resíduos é rejeitada: os intervalos de previsão (que supõem erros normais) devem ser interpretados com cautela.\n"
+            else:
+                conclusion += "* A normalidade dos resíduos não é rejeitada, o que dá respaldo aos intervalos de previsão.\n"
         conclusion += "\n"
         
         # 4. Veredito Final
         conclusion += "4. Veredito Final:\n"
-        if mape < 20 and alpha < 0.8:
+        if mape < 20 and alpha < 0.8 and not autocorrelacionados:
             conclusion += "* O modelo SES é ACEITÁVEL para previsões de curtíssimo prazo (h pequeno), dada sua simplicidade e acurácia razoável neste horizonte.\n"
             conclusion += "* No entanto, para horizontes maiores ou se a sazonalidade for confirmada como relevante, recomenda-se testar modelos mais completos (ex: Holt-Winters ou SARIMA).\n"
         else:
             conclusion += "* O modelo SES apresenta LIMITAÇÕES CLARAS para esta série.\n"
+            if autocorrelacionados:
+                conclusion += "* A autocorrelação dos resíduos (Ljung-Box) mostra que parte da dinâmica da série não está sendo modelada.\n"
             conclusion += "* Recomenda-se fortemente o uso de modelos que incorporem tendência e/ou sazonalidade para melhorar a capacidade preditiva.\n"
 
         return conclusion
 
     def run(self):
-        alpha, rmse, mape = self._fit_evaluate_model()
-        conclusion = self._generate_conclusion(alpha, rmse, mape)
+        with self._etapa("fit"):
+            alpha, rmse, mape = self._fit_evaluate_model()
+        conclusion = self._generate_conclusion(alpha, rmse, mape, self._load_diagnostics())
         
-        with open(self.file_path_conclusion, 'w') as f:
-            f.write(conclusion)
+        self._save_text(conclusion, self.file_path_conclusion, "q5")
         print(f"Conclusão geral salva em: {self.file_path_conclusion}")
 
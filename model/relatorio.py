@@ -1,21 +1,33 @@
 import json
 import os
 import pandas as pd
-import subprocess
-from jinja2 import Template
+from abstract.analysis import Analysis
+from abstract.arquivos import escrita_atomica
 
 """
 Classe responsável por gerar o relatório final em LaTeX.
 Compila os resultados gerados na pasta output e gera texto dissertativo usando Jinja2.
 """
-class Relatorio:
+class Relatorio(Analysis):
 
-    def __init__(self, output_dir: str):
+    def __init__(self, output_dir: str, sink=None, run_id: str = None, series_id: str = None,
+                 config: dict = None):
         self.output_dir = output_dir
+        # Quando há um banco de resultados (ResultadosSQLite), os dados são consultados nele
+        self.sink = sink
+        self.run_id = run_id
+        self.series_id = series_id
         self.file_path_report = os.path.join(self.output_dir, "relatorio_final.tex")
-        self.config = self._read_config()
+        # Compilador compartilhado (model.compilador_latex.CompiladorLatex), definido no modo frota
+        self.compilador = None
+        # Configuração da execução (freq, h) recebida do Controller; lida do banco/arquivo se ausente
+        self.config = config or self._read_config()
 
     def _read_config(self) -> dict:
+        if self.sink is not None:
+            config = self.sink.consultar_config(self.run_id, self.series_id)
+            if config:
+                return config
         path = os.path.join(self.output_dir, "config.json")
         if os.path.exists(path):
             with open(path, 'r') as f:
@@ -23,6 +35,8 @@ class Relatorio:
         return {"freq": 7, "h": 12} # Default fallback
 
     def _read_csv(self, filename: str) -> pd.DataFrame:
+        if self.sink is not None and filename in self.sink.ARQUIVOS:
+            return self.sink.consultar(self.sink.ARQUIVOS[filename], self.run_id, self.series_id)
         path = os.path.join(self.output_dir, filename)
         if os.path.exists(path):
             return pd.read_csv(path)
@@ -31,6 +45,8 @@ class Relatorio:
     def _get_q1_data(self):
         # Q1: ACF/PACF stats
         df = self._read_csv("q1_stats.csv")
+        if df.empty:
+            return {}
         
         # Identificar picos sazonais com base na frequência configurada
         freq = self.config.get("freq", 7)
@@ -90,17 +106,22 @@ class Relatorio:
         outliers_df = self._read_csv("q4_outliers.csv")
         metrics_df = self._read_csv("q4_metrics.csv")
         
-        std_resid = 0
-        if not metrics_df.empty:
-            std_resid = metrics_df['std_resid'].values[0]
+        diagnostics_df = self._read_csv("q4_residual_diagnostics.csv")
+        
+        if metrics_df.empty:
+            return {}
+        std_resid = metrics_df['std_resid'].values[0]
             
         return {
             "outliers_count": len(outliers_df),
             "outliers_list": outliers_df.to_dict('records'),
-            "std_resid": std_resid
+            "std_resid": std_resid,
+            "diagnostico": diagnostics_df.iloc[0].to_dict() if not diagnostics_df.empty else {}
         }
 
     def _generate_latex_content(self) -> str:
+        from jinja2 import Template
+
         # Coletar dados
         q1_data = self._get_q1_data()
         q2_data = self._get_q2_data()
@@ -132,16 +153,16 @@ A análise foi conduzida utilizando a linguagem Python e um conjunto de bibliote
 
 \begin{itemize}
     \item \textbf{pandas}: Utilizado para a manipulação e estruturação dos dados em formato tabular (DataFrames). Fundamental para o tratamento da série temporal, permitindo indexação temporal, tratamento de dados faltantes e operações de fatiamento para divisão entre treino e teste.
-    \item \textbf{numpy}: Empregado para operações numéricas de alto desempenho. Serve como base para cálculos matemáticos e vetoriais necessários durante a manipulação dos dados e cálculo de métricas.
-    \item \textbf{statsmodels}: Biblioteca central para a modelagem econométrica e estatística. Foi utilizada para:
+    \item \textbf{numpy}: Empregado para operações numéricas de alto desempenho. Sobre ele foram implementados os núcleos vetorizados que tratam observações ausentes sem descartá-las (preservando o eixo temporal):
     \begin{itemize}
-        \item Calcular as funções de autocorrelação (ACF) e autocorrelação parcial (PACF) na Questão 1.
-        \item Realizar os testes de raiz unitária e estacionariedade (ADF e KPSS) na Questão 2.
-        \item Estimar e ajustar o modelo de Suavização Exponencial Simples (SES) na Questão 3.
+        \item Funções de autocorrelação (ACF, via FFT) e autocorrelação parcial (PACF, Yule-Walker) e a estatística de Ljung-Box na Questão 1.
+        \item Estimação e ajuste do modelo de Suavização Exponencial Simples (SES) nas Questões 3 a 5.
+        \item Cálculo das métricas de acurácia: Raiz do Erro Quadrático Médio (RMSE), Erro Absoluto Médio (MAE) e Erro Percentual Absoluto Médio (MAPE).
+        \item Diagnóstico dos resíduos do SES na Questão 4: ACF residual, teste de Ljung-Box e teste de normalidade de Jarque-Bera.
     \end{itemize}
+    \item \textbf{statsmodels}: Biblioteca de modelagem econométrica e estatística, utilizada para realizar os testes de raiz unitária e estacionariedade (ADF e KPSS) na Questão 2.
     \item \textbf{matplotlib}: Utilizada para a geração de todas as visualizações gráficas do relatório, incluindo gráficos de linha da série temporal, correlogramas e gráficos de resíduos. Essencial para a inspeção visual dos resultados.
     \item \textbf{seaborn}: Utilizada para aprimorar a estética e o estilo das visualizações gráficas, garantindo gráficos mais informativos e visualmente agradáveis.
-    \item \textbf{scikit-learn}: Empregada para o cálculo rigoroso das métricas de avaliação de acurácia do modelo. Forneceu as funções para cálculo do Erro Quadrático Médio (MSE), Erro Absoluto Médio (MAE) e Erro Percentual Absoluto Médio (MAPE).
     \item \textbf{jinja2}: Motor de templates utilizado para a geração automatizada deste relatório. Permite a inserção dinâmica dos resultados estatísticos, tabelas e textos interpretativos diretamente na estrutura do documento LaTeX.
 \end{itemize}
 
@@ -157,6 +178,8 @@ A metodologia analítica seguiu as seguintes etapas:
 
 \subsection{Questão 1: Análise de Autocorrelação}
 
+{% if q1 %}
+{% if figuras.q1 %}
 A Figura \ref{fig:q1_plot} apresenta os correlogramas da série.
 
 \begin{figure}[htbp]
@@ -165,6 +188,7 @@ A Figura \ref{fig:q1_plot} apresenta os correlogramas da série.
     \caption{Função de Autocorrelação (ACF) e Autocorrelação Parcial (PACF)}
     \label{fig:q1_plot}
 \end{figure}
+{% endif %}
 
 A análise dos correlogramas revela informações importantes sobre a estrutura da série temporal. 
 {% if q1.peaks %}
@@ -179,10 +203,14 @@ Isso indica uma alta persistência (memória longa), o que pode sugerir não-est
 {% else %}
 O decaimento rápido da função de autocorrelação sugere que a série possui uma dependência de curto prazo e tende à estacionariedade.
 {% endif %}
+{% else %}
+Resultados não disponíveis nesta execução (etapa não selecionada ou com falha).
+{% endif %}
 
 
 \subsection{Questão 2: Testes de Estacionariedade}
 
+{% if q2.adf_pvalue is defined and q2.kpss_pvalue is defined %}
 Para confirmar as impressões visuais, foram realizados os testes formais ADF e KPSS.
 
 \begin{table}[htbp]
@@ -207,10 +235,14 @@ Ambos os testes concordam que a série NÃO é estacionária (possui raiz unitá
 {% else %}
 Há um conflito entre os testes. O teste ADF indica {% if q2.adf_pvalue < 0.05 %}estacionariedade{% else %}não estacionariedade{% endif %}, enquanto o teste KPSS sugere {% if q2.kpss_pvalue >= 0.05 %}estacionariedade{% else %}não estacionariedade{% endif %}. Isso pode indicar processos como estacionariedade por diferença ou tendência determinística.
 {% endif %}
+{% else %}
+Resultados não disponíveis nesta execução (etapa não selecionada ou com falha).
+{% endif %}
 
 \subsection{Questão 3: Previsão com Suavização Exponencial Simples (SES)}
 
-O modelo SES foi ajustado aos dados. A Figura \ref{fig:q3_plot} ilustra o ajuste e a previsão.
+{% if q3 %}
+O modelo SES foi ajustado aos dados.{% if figuras.q3 %} A Figura \ref{fig:q3_plot} ilustra o ajuste e a previsão.
 
 \begin{figure}[htbp]
     \centering
@@ -218,6 +250,7 @@ O modelo SES foi ajustado aos dados. A Figura \ref{fig:q3_plot} ilustra o ajuste
     \caption{Previsão SES vs Dados Reais}
     \label{fig:q3_plot}
 \end{figure}
+{% endif %}
 
 O parâmetro de suavização ($\alpha$) estimado foi de {{ "%.4f"|format(q3.Alpha) }}. 
 {% if q3.Alpha < 0.2 %}
@@ -236,17 +269,22 @@ O MAPE elevado sugere que o modelo SES pode não ser o mais adequado, possivelme
 {% endif %}
 
 O método SES, por projetar uma previsão constante, é teoricamente limitado para séries com tendência ou sazonalidade marcantes.
+{% else %}
+Resultados não disponíveis nesta execução (etapa não selecionada ou com falha).
+{% endif %}
 
 \subsection{Questão 4: Diagnóstico de Outliers}
 
-A análise de resíduos (Figura \ref{fig:q4_plot}) permitiu identificar pontos atípicos.
-
+{% if q4 %}
+A análise de resíduos{% if figuras.q4 %} (Figura \ref{fig:q4_plot}){% endif %} permitiu identificar pontos atípicos.
+{% if figuras.q4 %}
 \begin{figure}[htbp]
     \centering
     \includegraphics[width=1.0\textwidth]{q4_outliers_plot.png}
     \caption{Resíduos do Modelo SES e Outliers Detectados}
     \label{fig:q4_plot}
 \end{figure}
+{% endif %}
 
 Utilizando o critério de 3 desvios padrão, foram identificados {{ q4.outliers_count }} \textit{outliers}. 
 A presença destes pontos, com um desvio padrão residual de {{ "%.4f"|format(q4.std_resid) }}, pode impactar a precisão das estimativas de erro (RMSE) e aumentar a incerteza das previsões. 
@@ -255,49 +293,66 @@ A natureza destes pontos deve ser investigada para determinar se são erros de c
 {% else %}
 A ausência de outliers estatísticos sugere que o modelo comporta-se de maneira estável em relação à variabilidade dos dados.
 {% endif %}
+{% if q4.diagnostico %}
+
+Quanto à adequação dos resíduos, o teste de Ljung-Box com {{ q4.diagnostico.Lags|int }} defasagens resultou em $Q = {{ "%.4f"|format(q4.diagnostico["Ljung-Box Q-Stat"]) }}$ (p-valor {{ "%.4f"|format(q4.diagnostico["Ljung-Box p-value"]) }}), com {{ q4.diagnostico["ACF Lags Outside CI"]|int }} defasagem(ns) da ACF residual fora do intervalo de confiança.
+{% if q4.diagnostico["Ljung-Box p-value"] < 0.05 %}
+Os resíduos apresentam autocorrelação significativa, indicando estrutura não capturada pelo SES.
+{% else %}
+Os resíduos são compatíveis com ruído branco.
+{% endif %}
+O teste de Jarque-Bera ($JB = {{ "%.4f"|format(q4.diagnostico["Jarque-Bera"]) }}$, p-valor {{ "%.4f"|format(q4.diagnostico["Jarque-Bera p-value"]) }}) {% if q4.diagnostico["Jarque-Bera p-value"] < 0.05 %}rejeita{% else %}não rejeita{% endif %} a normalidade dos resíduos.
+{% endif %}
+{% else %}
+Resultados não disponíveis nesta execução (etapa não selecionada ou com falha).
+{% endif %}
 
 \section{Conclusões}
 
+{% if q3 %}
 Com base em todas as análises realizadas, conclui-se que o modelo SES apresenta um desempenho {% if q3.MAPE < 20 %}aceitável{% else %}limitado{% endif %} para previsões de curto prazo.
+{% endif %}
+{% if q1 %}
 A análise exploratória indicou {% if q1.peaks %}presença{% else %}ausência{% endif %} de sazonalidade forte na frequência analisada.
+{% endif %}
 Como o SES não modela explicitamente tendência nem sazonalidade, sua aplicação deve ser feita com cautela, especialmente para horizontes de previsão mais longos onde esses componentes estruturais dominariam.
 
 \end{document}
 """
         
+        # Figuras só são incluídas se foram geradas (execuções sem gráficos as omitem)
+        figuras = {
+            "q1": os.path.exists(os.path.join(self.output_dir, "q1_acf_pacf.png")),
+            "q3": os.path.exists(os.path.join(self.output_dir, "q3_forecast_plot.png")),
+            "q4": os.path.exists(os.path.join(self.output_dir, "q4_outliers_plot.png"))
+        }
+
         template = Template(template_str)
-        return template.render(q1=q1_data, q2=q2_data, q3=q3_data, q4=q4_data)
+        return template.render(q1=q1_data, q2=q2_data, q3=q3_data, q4=q4_data, figuras=figuras)
 
     def persist_results(self):
         latex_content = self._generate_latex_content()
-        with open(self.file_path_report, 'w') as f:
+        with escrita_atomica(self.file_path_report) as f:
             f.write(latex_content)
         print(f"Relatório LaTeX salvo em: {self.file_path_report}")
         return "Relatório final gerado com sucesso."
 
     def _compile_pdf(self):
         """
-        Compila o arquivo .tex para .pdf usando pdflatex.
+        Compila o arquivo .tex para .pdf (model.compilador_latex). Com um compilador
+        compartilhado (modo frota), a compilação é apenas agendada.
         """
-        try:
-            # Executa pdflatex duas vezes para garantir referências cruzadas corretas
-            for _ in range(2):
-                subprocess.run(
-                    ["pdflatex", "-interaction=nonstopmode", "relatorio_final.tex"],
-                    cwd=self.output_dir,
-                    check=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE
-                )
-            print(f"PDF gerado com sucesso em: {os.path.join(self.output_dir, 'relatorio_final.pdf')}")
-        except subprocess.CalledProcessError as e:
-            print("Erro ao compilar o PDF.")
-            # Tentativa de decodificar com latin1, fallback para utf-8 ignorando erros
-            try:
-                print(e.stdout.decode('latin1'))
-            except:
-                print(e.stdout.decode('utf-8', errors='ignore'))
+        if self.compilador is not None:
+            self.compilador.agendar(self.file_path_report)
+            return
+        from model.compilador_latex import compilar, informar
+
+        informar(compilar(self.file_path_report))
 
     def run(self):
-        self.persist_results()
-        self._compile_pdf()
+        with self._etapa("render"):
+            self.persist_results()
+            self._registrar_arquivo(self.file_path_report)
+        with self._etapa("compile"):
+            self._compile_pdf()
+            self._registrar_arquivo(os.path.join(self.output_dir, "relatorio_final.pdf"))
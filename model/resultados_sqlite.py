@@ -0,0 +1,188 @@
+import os
+import sqlite3
+import time
+import pandas as pd
+
+from abstract.arquivos import escrita_atomica
+
+"""
+Destino (sink) de resultados em SQLite, alternativo aos arquivos CSV/TXT em output/.
+Há uma tabela por artefato de cada questão, com as mesmas colunas dos CSVs exportados,
+acrescidas de run_id e series_id (indexados). As inserções ficam em buffer e são gravadas
+em uma única transação por lote de séries (flush).
+"""
+class ResultadosSQLite:
+
+    # tabela -> colunas (mesmos nomes dos CSVs) e tipos
+    TABELAS = {
+        "q1_stats": {
+            "Lag": "INTEGER", "ACF": "REAL", "ACF_Lower_CI": "REAL", "ACF_Upper_CI": "REAL",
+            "PACF": "REAL", "PACF_Lower_CI": "REAL", "PACF_Upper_CI": "REAL",
+            "Ljung-Box Q-Stat": "REAL", "Ljung-Box p-value": "REAL"
+        },
+        "q2_stationarity_results": {"Test": "TEXT", "Metric": "TEXT", "Value": "REAL"},
+        "q3_metrics": {"RMSE": "REAL", "MAE": "REAL", "MAPE": "REAL", "Alpha": "REAL"},
+        "q3_hier_forecasts": {
+            "Node": "TEXT", "Level": "TEXT", "Method": "TEXT", "Date": "TEXT", "Forecast": "REAL", "Actual": "REAL"
+        },
+        "q3_hier_metrics": {"Level": "TEXT", "Method": "TEXT", "RMSE": "REAL", "MAE": "REAL", "MAPE": "REAL"},
+        "q4_outliers": {"Date": "TEXT", "Residual": "REAL"},
+        "q4_metrics": {"std_resid": "REAL"},
+        "q4_residual_diagnostics": {
+            "Lags": "INTEGER", "Ljung-Box Q-Stat": "REAL", "Ljung-Box p-value": "REAL", "ACF Lags Outside CI": "INTEGER",
+            "Jarque-Bera": "REAL", "Jarque-Bera p-value": "REAL", "Skewness": "REAL", "Kurtosis": "REAL"
+        },
+        "q4_residual_acf": {
+            "Lag": "INTEGER", "ACF": "REAL", "ACF_Lower_CI": "REAL", "ACF_Upper_CI": "REAL",
+            "Ljung-Box Q-Stat": "REAL", "Ljung-Box p-value": "REAL"
+        },
+    }
+
+    # Arquivo exportado -> tabela (usado pelo Relatorio e pela exportação)
+    ARQUIVOS = {f"{tabela}.csv": tabela for tabela in TABELAS}
+    TEXTOS = {
+        "q1": "q1_interpretation.txt",
+        "q3": "q3_interpretation.txt",
+        "q4": "q4_interpretation.txt",
+        "q5": "q5_general_conclusion.txt",
+    }
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        diretorio = os.path.dirname(os.path.abspath(caminho))
+        if not os.path.exists(diretorio):
+            os.makedirs(diretorio)
+        self.conn = sqlite3.connect(caminho)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._buffer = {}
+        self._criar_schema()
+
+    def _criar_schema(self):
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs (run_id TEXT, series_id TEXT, freq INTEGER, h INTEGER, "
+                "created_at REAL, PRIMARY KEY (run_id, series_id))"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS interpretations (run_id TEXT, series_id TEXT, question TEXT, text TEXT)"
+            )
+            for tabela, colunas in self.TABELAS.items():
+                definicao = ", ".join(f'"{c}" {t}' for c, t in colunas.items())
+                self.conn.execute(f"CREATE TABLE IF NOT EXISTS {tabela} (run_id TEXT, series_id TEXT, {definicao})")
+            for tabela in ["runs", "interpretations", *self.TABELAS]:
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabela}_series ON {tabela} (series_id)")
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{tabela}_run ON {tabela} (run_id)")
+
+    def _sql_insert(self, tabela: str, colunas: list) -> str:
+        nomes = ", ".join(f'"{c}"' for c in colunas)
+        marcadores = ", ".join("?" * len(colunas))
+        return f"INSERT INTO {tabela} ({nomes}) VALUES ({marcadores})"
+
+    def registrar_execucao(self, run_id: str, series_id: str, freq: int, h: int):
+        self._buffer.setdefault("runs", []).append((run_id, series_id, freq, h, time.time()))
+
+    def inserir(self, tabela: str, run_id: str, series_id: str, df: pd.DataFrame):
+        """
+        Acumula as linhas de um DataFrame no buffer da tabela (gravadas no próximo flush).
+        """
+        colunas = list(self.TABELAS[tabela])
+        valores = df.reindex(columns=colunas)
+        # Datas no mesmo formato textual do CSV exportado
+        for coluna in valores.columns[[pd.api.types.is_datetime64_any_dtype(t) for t in valores.dtypes]]:
+            valores[coluna] = valores[coluna].astype(str)
+        valores = valores.astype(object).where(valores.notna(), None)
+        linhas = list(valores.itertuples(index=False, name=None))
+        linhas = [(run_id, series_id, *row) for row in linhas]
+        self._buffer.setdefault(tabela, []).extend(linhas)
+
+    def inserir_texto(self, questao: str, run_id: str, series_id: str, texto: str):
+        self._buffer.setdefault("interpretations", []).append((run_id, series_id, questao, texto))
+
+    def marcar(self) -> dict:
+        """
+        Posição atual do buffer, para descartar as linhas de uma etapa que falhou (reverter).
+        """
+        return {tabela: len(linhas) for tabela, linhas in self._buffer.items()}
+
+    def reverter(self, marca: dict):
+        for tabela, linhas in self._buffer.items():
+            del linhas[marca.get(tabela, 0):]
+
+    def flush(self):
+        """
+        Grava todo o buffer em uma única transação.
+        """
+        if not self._buffer:
+            return
+        with self.conn:
+            for tabela, linhas in self._buffer.items():
+                if tabela == "runs":
+                    sql = "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?)"
+                elif tabela == "interpretations":
+                    sql = "INSERT INTO interpretations VALUES (?, ?, ?, ?)"
+                else:
+                    sql = self._sql_insert(tabela, ["run_id", "series_id", *self.TABELAS[tabela]])
+                self.conn.executemany(sql, linhas)
+        total = sum(len(linhas) for linhas in self._buffer.values())
+        self._buffer = {}
+        print(f"{total} linhas gravadas no banco de resultados: {self.caminho}")
+
+    def consultar(self, tabela: str, run_id: str = None, series_id: str = None) -> pd.DataFrame:
+        """
+        Consulta uma tabela filtrando por execução e/ou série.
+        Retorna as mesmas colunas do CSV correspondente.
+        """
+        filtros, params = [], []
+        if run_id is not None:
+            filtros.append("run_id = ?")
+            params.append(run_id)
+        if series_id is not None:
+            filtros.append("series_id = ?")
+            params.append(series_id)
+        where = f" WHERE {' AND '.join(filtros)}" if filtros else ""
+        if tabela not in self.TABELAS:
+            return pd.read_sql_query(f"SELECT * FROM {tabela}{where} ORDER BY rowid", self.conn, params=params)
+        colunas = ", ".join(f'"{c}"' for c in self.TABELAS[tabela])
+        df = pd.read_sql_query(f"SELECT {colunas} FROM {tabela}{where} ORDER BY rowid", self.conn, params=params)
+        # Uma coluna inteiramente NULL volta como object (None); converte para os tipos declarados
+        # para que NULL vire NaN, como na leitura do CSV
+        for coluna, tipo in self.TABELAS[tabela].items():
+            if tipo == "REAL":
+                df[coluna] = pd.to_numeric(df[coluna], errors="coerce").astype(float)
+            elif tipo == "INTEGER":
+                df[coluna] = pd.to_numeric(df[coluna], errors="coerce")
+        return df
+
+    def consultar_config(self, run_id: str, series_id: str) -> dict:
+        df = self.consultar("runs", run_id, series_id)
+        if df.empty:
+            return {}
+        return {"freq": int(df["freq"].iloc[0]), "h": int(df["h"].iloc[0])}
+
+    def consultar_texto(self, questao: str, run_id: str, series_id: str) -> str:
+        df = self.consultar("interpretations", run_id, series_id)
+        df = df[df["question"] == questao]
+        return df["text"].iloc[-1] if not df.empty else ""
+
+    def exportar(self, run_id: str, series_id: str, diretorio: str):
+        """
+        Exporta os resultados de uma execução/série para os arquivos CSV/TXT tradicionais.
+        """
+        if not os.path.exists(diretorio):
+            os.makedirs(diretorio)
+        for arquivo, tabela in self.ARQUIVOS.items():
+            df = self.consultar(tabela, run_id, series_id)
+            if not df.empty or tabela == "q4_outliers":
+                with escrita_atomica(os.path.join(diretorio, arquivo), newline='') as f:
+                    df.to_csv(f, index=False)
+        for questao, arquivo in self.TEXTOS.items():
+            texto = self.consultar_texto(questao, run_id, series_id)
+            if texto:
+                with escrita_atomica(os.path.join(diretorio, arquivo)) as f:
+                    f.write(texto)
+        print(f"Resultados exportados em: {diretorio}")
+
+    def fechar(self):
+        self.flush()
+        self.conn.close()
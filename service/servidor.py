@@ -0,0 +1,298 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import signal
+import time
+from collections import deque
+from urllib.parse import urlsplit, parse_qs
+
+from abstract.arquivos import escrita_atomica
+from model.estado_ses import EstadoSES
+from model.armazem_modelos import ArmazemModelos
+
+"""
+Serviço HTTP local (asyncio, somente biblioteca padrão) para servir previsões SES.
+Carrega os estados ajustados pela Questão 3 (q3_ses_state.json), mantém tudo em memória
+e responde previsões h passos à frente com intervalos, aceita novas observações para
+atualizar o estado e expõe contadores de latência e vazão.
+Os estados atualizados por /observe só são gravados com salvar_em (--salvar-em): ao encerrar o
+serviço e, com salvar_a_cada, periodicamente; sem ele as observações recebidas se perdem ao reiniciar.
+
+Rotas:
+    GET  /series                         lista os ids carregados
+    GET  /forecast/<id>?h=7&level=0.95   previsão e intervalos
+    POST /observe/<id>  {"values": [..]} atualiza o estado com novas observações
+    GET  /metrics                        contadores de latência/vazão
+    GET  /health
+"""
+
+class MetricasServico:
+
+    def __init__(self, janela: int = 10000):
+        self.inicio = time.monotonic()
+        self.requisicoes = 0
+        self.erros = 0
+        self.por_rota = {}
+        # Janela circular das latências mais recentes (segundos)
+        self.latencias = deque(maxlen=janela)
+
+    def registrar(self, rota: str, latencia: float, erro: bool):
+        self.requisicoes += 1
+        self.erros += int(erro)
+        self.por_rota[rota] = self.por_rota.get(rota, 0) + 1
+        self.latencias.append(latencia)
+
+    def _percentil(self, valores: list, p: float) -> float:
+        if not valores:
+            return 0.0
+        k = min(len(valores) - 1, int(round(p / 100 * (len(valores) - 1))))
+        return valores[k]
+
+    def resumo(self) -> dict:
+        uptime = time.monotonic() - self.inicio
+        ordenadas = sorted(self.latencias)
+        return {
+            "uptime_s": uptime,
+            "requests": self.requisicoes,
+            "errors": self.erros,
+            "requests_by_route": self.por_rota,
+            "throughput_rps": self.requisicoes / uptime if uptime > 0 else 0.0,
+            "latency_us": {
+                "p50": self._percentil(ordenadas, 50) * 1e6,
+                "p90": self._percentil(ordenadas, 90) * 1e6,
+                "p99": self._percentil(ordenadas, 99) * 1e6,
+                "max": (ordenadas[-1] if ordenadas else 0.0) * 1e6
+            }
+        }
+
+
+class ServidorPrevisao:
+
+    STATUS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+    # Maior horizonte aceito em /forecast (a resposta cresce linearmente com h)
+    H_MAXIMO = 1000
+
+    def __init__(self, host: str = "127.0.0.1", porta: int = 8080, salvar_em: str = None,
+                 salvar_a_cada: float = None):
+        self.host = host
+        self.porta = porta
+        self.estados = {}
+        self.metricas = MetricasServico()
+        self._server = None
+        # Persistência dos estados atualizados por /observe (arquivo JSON {id: estado})
+        self.salvar_em = salvar_em
+        self.salvar_a_cada = salvar_a_cada
+        self._alterado = False
+
+    def carregar_estados(self, caminho: str):
+        """
+        Carrega estados SES de um arquivo JSON ({id: estado}), de todos os arquivos
+        *ses_state.json de um diretório e seus subdiretórios (ex: output/<run_id>/) ou da versão
+        corrente de um armazém de modelos. Os arquivos são lidos em ordem de caminho; como os
+        run_ids começam pelo instante da execução, o estado mais recente de cada série prevalece.
+        """
+        if os.path.exists(os.path.join(caminho, "ATUAL")):
+            for estado in ArmazemModelos(caminho).carregar().iterar():
+                self.estados[estado.serie_id] = estado
+            print(f"{len(self.estados)} estados SES carregados do armazém: {caminho}")
+            return
+        if os.path.isdir(caminho):
+            arquivos = sorted(os.path.join(raiz, f) for raiz, _, nomes in os.walk(caminho)
+                              for f in nomes if f.endswith("ses_state.json"))
+        else:
+            arquivos = [caminho]
+        for arquivo in arquivos:
+            with open(arquivo, 'r') as f:
+                for serie_id, d in json.load(f).items():
+                    self.estados[str(serie_id)] = EstadoSES.from_dict(d)
+        print(f"{len(self.estados)} estados SES carregados de: {caminho}")
+
+    def salvar_estados(self, caminho: str):
+        with escrita_atomica(caminho) as f:
+            json.dump({k: e.to_dict() for k, e in self.estados.items()}, f, indent=2)
+        print(f"Estados SES salvos em: {caminho}")
+
+    def _persistir(self):
+        if self.salvar_em and self._alterado:
+            self._alterado = False
+            self.salvar_estados(self.salvar_em)
+
+    async def _salvar_periodicamente(self):
+        while True:
+            await asyncio.sleep(self.salvar_a_cada)
+            try:
+                self._persistir()
+            except OSError as e:
+                self._alterado = True
+                print(f"Falha ao salvar os estados SES: {e}")
+
+    # Rotas
+    def _forecast(self, serie_id: str, query: dict):
+        estado = self.estados.get(serie_id)
+        if estado is None:
+            return 404, {"error": f"série '{serie_id}' não encontrada"}
+        try:
+            h = int(query.get("h", ["7"])[0])
+            nivel = float(query.get("level", ["0.95"])[0])
+        except ValueError:
+            h, nivel = 0, 0.0
+        if not (1 <= h <= self.H_MAXIMO) or not (0 < nivel < 1):
+            return 400, {"error": f"parâmetros inválidos: h inteiro entre 1 e {self.H_MAXIMO} e 0 < level < 1"}
+        return 200, estado.prever(h, nivel)
+
+    def _observe(self, serie_id: str, corpo: bytes):
+        estado = self.estados.get(serie_id)
+        if estado is None:
+            return 404, {"error": f"série '{serie_id}' não encontrada"}
+        dados = json.loads(corpo or b"{}")
+        if not isinstance(dados, dict):
+            return 400, {"error": "o corpo deve ser um objeto JSON"}
+        valores = dados.get("values", [])
+        if not isinstance(valores, list):
+            return 400, {"error": "'values' deve ser uma lista"}
+        # Valida o lote inteiro antes de alterar o estado: uma requisição rejeitada não aplica nada
+        convertidos = []
+        for i, y in enumerate(valores):
+            if y is None:
+                convertidos.append(None)
+                continue
+            try:
+                valido = not isinstance(y, bool) and isinstance(y, (int, float)) and math.isfinite(float(y))
+            except OverflowError:
+                valido = False
+            if not valido:
+                return 400, {"error": f"'values[{i}]' deve ser um número finito ou null"}
+            convertidos.append(float(y))
+        estado.atualizar(convertidos)
+        self._alterado = True
+        return 200, estado.to_dict()
+
+    def _despachar(self, metodo: str, alvo: str, corpo: bytes):
+        url = urlsplit(alvo)
+        partes = [p for p in url.path.split("/") if p]
+        query = parse_qs(url.query)
+        rota = "/" + (partes[0] if partes else "")
+
+        if rota == "/forecast" and len(partes) == 2:
+            return rota, (self._forecast(partes[1], query) if metodo == "GET" else (405, {"error": "use GET"}))
+        if rota == "/observe" and len(partes) == 2:
+            return rota, (self._observe(partes[1], corpo) if metodo == "POST" else (405, {"error": "use POST"}))
+        if rota == "/series":
+            return rota, (200, {"series": sorted(self.estados)})
+        if rota == "/metrics":
+            return rota, (200, self.metricas.resumo())
+        if rota == "/health":
+            return rota, (200, {"status": "ok", "series": len(self.estados)})
+        return rota, (404, {"error": "rota não encontrada"})
+
+    async def _atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Atende uma conexão HTTP/1.1 (com keep-alive) até o cliente encerrá-la.
+        """
+        try:
+            while True:
+                linha = await reader.readline()
+                if not linha:
+                    break
+                inicio = time.perf_counter()
+                try:
+                    metodo, alvo, versao = linha.decode("latin1").split()
+                except ValueError:
+                    break
+
+                cabecalhos = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    chave, _, valor = h.decode("latin1").partition(":")
+                    cabecalhos[chave.strip().lower()] = valor.strip()
+                try:
+                    tamanho = int(cabecalhos.get("content-length", 0))
+                except ValueError:
+                    tamanho = -1
+                # Sem um Content-Length válido o corpo não pode ser delimitado: responde 400 e encerra a conexão
+                if tamanho < 0:
+                    cabecalhos["connection"] = "close"
+                corpo = await reader.readexactly(tamanho) if tamanho > 0 else b""
+
+                try:
+                    if tamanho < 0:
+                        raise ValueError("Content-Length inválido")
+                    rota, (status, payload) = self._despachar(metodo, alvo, corpo)
+                except (ValueError, KeyError) as e:
+                    rota, status, payload = "erro", 400, {"error": str(e)}
+                except Exception as e:
+                    rota, status, payload = "erro", 500, {"error": str(e)}
+
+                dados = json.dumps(payload).encode()
+                manter = cabecalhos.get("connection", "").lower() != "close" and versao == "HTTP/1.1"
+                writer.write(
+                    f"HTTP/1.1 {status} {self.STATUS.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(dados)}\r\n"
+                    f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n".encode() + dados
+                )
+                await writer.drain()
+                self.metricas.registrar(rota, time.perf_counter() - inicio, status >= 400)
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def iniciar(self):
+        self._server = await asyncio.start_server(self._atender, self.host, self.porta)
+        self.porta = self._server.sockets[0].getsockname()[1]
+        print(f"Servidor de previsão ouvindo em http://{self.host}:{self.porta}")
+        return self._server
+
+    async def parar(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def run(self):
+        async def _principal():
+            server = await self.iniciar()
+            # SIGINT/SIGTERM encerram o serviço normalmente, para que os estados sejam gravados
+            parada = asyncio.Event()
+            loop = asyncio.get_running_loop()
+            for sinal in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(sinal, parada.set)
+            tarefa = asyncio.create_task(self._salvar_periodicamente()) if self.salvar_a_cada else None
+            async with server:
+                await parada.wait()
+            if tarefa is not None:
+                tarefa.cancel()
+
+        try:
+            asyncio.run(_principal())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._persistir()
+        print("Servidor encerrado.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço local de previsões SES.")
+    parser.add_argument("--estados", default="output/",
+                        help="Arquivo q3_ses_state.json, diretório (busca recursiva por *ses_state.json) ou armazém de modelos")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8080)
+    parser.add_argument("--salvar-em", help="Arquivo JSON onde os estados atualizados são gravados ao encerrar")
+    parser.add_argument("--salvar-a-cada", type=float, default=None,
+                        help="Também grava os estados a cada N segundos (requer --salvar-em)")
+    args = parser.parse_args()
+
+    servidor = ServidorPrevisao(args.host, args.porta, args.salvar_em, args.salvar_a_cada)
+    servidor.carregar_estados(args.estados)
+    servidor.run()
+
+
+if __name__ == "__main__":
+    main()